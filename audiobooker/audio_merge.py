@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+import os
+import re
+import shutil
 import subprocess
+import tempfile
 from pathlib import Path
 from typing import Iterable, List, Optional
 
+from .pcm import WavFormat
 from .utils import ensure_dir, ffmpeg_exists, safe_remove
 
 
+def _temp_path(directory: Path, suffix: str) -> Path:
+    fd, name = tempfile.mkstemp(prefix=".merge_", suffix=suffix, dir=directory)
+    os.close(fd)
+    return Path(name)
+
+
 def _write_concat_list(paths: Iterable[Path], list_path: Path) -> None:
     lines = [f"file '{p.resolve().as_posix()}'" for p in paths]
     list_path.write_text("\n".join(lines), encoding="utf-8")
@@ -22,8 +33,10 @@ def _write_ffmetadata(
     if title:
         lines.append(f"title={title}")
     start = 0
+    elapsed = 0.0
     for name, duration in zip(chapter_titles, chapter_durations):
-        end = start + int(duration * 1000)
+        elapsed += duration
+        end = int(round(elapsed * 1000))
         lines.extend(
             [
                 "[CHAPTER]",
@@ -37,6 +50,14 @@ def _write_ffmetadata(
     output_path.write_text("\n".join(lines), encoding="utf-8")
 
 
+def _codec_args(fmt: str) -> List[str]:
+    if fmt == "mp3":
+        return ["-codec:a", "libmp3lame", "-b:a", "192k"]
+    if fmt == "m4b":
+        return ["-codec:a", "aac", "-b:a", "192k"]
+    return ["-codec:a", "pcm_s16le"]
+
+
 def concat_audio(
     input_wavs: List[Path],
     output_path: Path,
@@ -46,15 +67,18 @@ def concat_audio(
     metadata_title: Optional[str] = None,
     chapter_titles: Optional[List[str]] = None,
     chapter_durations: Optional[List[float]] = None,
+    gain_db: Optional[float] = None,
 ) -> Path:
     if not ffmpeg_exists():
         raise RuntimeError("ffmpeg not found in PATH.")
 
     ensure_dir(output_path.parent)
-    list_path = output_path.parent / "concat_list.txt"
+    # The concat demuxer feeds the filters and encoder directly, so no
+    # intermediate WAV of the whole input is written. Side files get
+    # per-call names so merges running in the same directory do not collide.
+    list_path = _temp_path(output_path.parent, ".txt")
     _write_concat_list(input_wavs, list_path)
-    temp_wav = output_path.parent / "merged_temp.wav"
-    concat_cmd = [
+    args = [
         "ffmpeg",
         "-y",
         "-f",
@@ -63,22 +87,11 @@ def concat_audio(
         "0",
         "-i",
         str(list_path),
-        "-c:a",
-        "pcm_s16le",
-        str(temp_wav),
-    ]
-    subprocess.run(concat_cmd, check=True)
-
-    args = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(temp_wav),
     ]
 
     metadata_path: Optional[Path] = None
     if fmt == "m4b" and chapter_titles and chapter_durations:
-        metadata_path = output_path.parent / "chapters_metadata.txt"
+        metadata_path = _temp_path(output_path.parent, ".ffmeta")
         _write_ffmetadata(chapter_titles, chapter_durations, metadata_path, title=metadata_title)
         args.extend(["-i", str(metadata_path), "-map_metadata", "1"])
 
@@ -97,23 +110,140 @@ def concat_audio(
                 "alimiter=limit=0.95",
             ]
         )
+    if gain_db:
+        # After the natural chain, which would otherwise compress part of it away.
+        filter_chain.append(f"volume={gain_db:.2f}dB")
     if normalize:
         filter_chain.append("loudnorm")
     if filter_chain:
         args.extend(["-af", ",".join(filter_chain)])
 
-    if fmt == "mp3":
-        args.extend(["-codec:a", "libmp3lame", "-b:a", "192k"])
-    elif fmt == "m4b":
-        args.extend(["-codec:a", "aac", "-b:a", "192k"])
-    else:
-        args.extend(["-codec:a", "pcm_s16le"])
-
+    args.extend(_codec_args(fmt))
     args.append(str(output_path))
-    subprocess.run(args, check=True)
+    try:
+        subprocess.run(args, check=True)
+    finally:
+        safe_remove(list_path)
+        if metadata_path:
+            safe_remove(metadata_path)
+    return output_path
 
-    safe_remove(temp_wav)
-    safe_remove(list_path)
-    if metadata_path:
+
+def probe_duration(path: Path) -> float:
+    """Duration of an audio file in seconds, from ffprobe or ffmpeg's input banner."""
+    if shutil.which("ffprobe"):
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                str(path),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return float(result.stdout.strip())
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(path)], capture_output=True, text=True)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr)
+    if not match:
+        raise RuntimeError(f"Could not read the duration of {path}.")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def assemble_copy(
+    chapter_files: List[Path],
+    output_path: Path,
+    metadata_title: Optional[str] = None,
+    chapter_titles: Optional[List[str]] = None,
+) -> Path:
+    """Join already encoded chapter files by stream copy, adding chapter markers.
+
+    Nothing is decoded or re-encoded; chapter boundaries come from the probed
+    duration of each file, so the inputs must share codec and parameters.
+    """
+    if not ffmpeg_exists():
+        raise RuntimeError("ffmpeg not found in PATH.")
+
+    ensure_dir(output_path.parent)
+    list_path = _temp_path(output_path.parent, ".txt")
+    metadata_path = _temp_path(output_path.parent, ".ffmeta")
+    try:
+        _write_concat_list(chapter_files, list_path)
+        titles = chapter_titles or [p.stem for p in chapter_files]
+        durations = [probe_duration(p) for p in chapter_files]
+        _write_ffmetadata(titles, durations, metadata_path, title=metadata_title)
+        args = [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(list_path),
+            "-i",
+            str(metadata_path),
+            "-map",
+            "0:a",
+            "-map_metadata",
+            "1",
+            "-map_chapters",
+            "1",
+            "-c",
+            "copy",
+        ]
+        if metadata_title:
+            args.extend(["-metadata", f"title={metadata_title}"])
+        args.append(str(output_path))
+        subprocess.run(args, check=True)
+    finally:
+        safe_remove(list_path)
         safe_remove(metadata_path)
     return output_path
+
+
+def encode_pcm(
+    pcm_blocks: Iterable[bytes],
+    pcm_format: WavFormat,
+    output_path: Path,
+    fmt: str = "mp3",
+) -> Path:
+    """Encode 16-bit PCM produced in Python by piping it to ffmpeg, without a temp file."""
+    if not ffmpeg_exists():
+        raise RuntimeError("ffmpeg not found in PATH.")
+
+    ensure_dir(output_path.parent)
+    args = [
+        "ffmpeg",
+        "-y",
+        "-f",
+        "s16le",
+        "-ar",
+        str(pcm_format.sample_rate),
+        "-ac",
+        str(pcm_format.channels),
+        "-i",
+        "pipe:0",
+        *_codec_args(fmt),
+        str(output_path),
+    ]
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE)
+    try:
+        for block in pcm_blocks:
+            proc.stdin.write(block)
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+    return output_path
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .pdf_to_text import ExtractedText
+from .utils import ensure_dir, sha256_file
+
+
+def normalize_cache_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def audio_cache_key(
+    text: str,
+    engine: str,
+    voice_hash: str,
+    speed: float,
+    speaker_hash: str = "",
+    language: str = "",
+) -> str:
+    fields = [normalize_cache_text(text), engine, voice_hash, f"{speed:.4f}", speaker_hash]
+    # Only engines that take a language add it, so other keys stay unchanged.
+    if language:
+        fields.append(language)
+    payload = json.dumps(fields, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Eviction frees space down to this fraction of `max_bytes`.
+_LOW_WATER = 0.9
+
+
+class AudioCache:
+    """Content-addressed WAV store shared across books and output dirs.
+
+    Entries live at `<root>/<key[:2]>/<key>.wav`. A hit refreshes the entry's
+    mtime, which doubles as the LRU clock; once the store grows past
+    `max_bytes` the least recently used entries are removed until it is back
+    under a low-water mark, so the directory scan is not repeated per write. Writes go through
+    a temp file and `os.replace`, so several processes can share one root.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int) -> None:
+        self.root = ensure_dir(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(size for _, _, size in self._entries())
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.wav"
+
+    def _entries(self) -> List[Tuple[float, Path, int]]:
+        entries: List[Tuple[float, Path, int]] = []
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(".wav"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, Path(entry.path), stat.st_size))
+        return entries
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def contains(self, key: str) -> bool:
+        return self._entry_path(key).exists()
+
+    def get(self, key: str, dest: str | Path) -> bool:
+        """Copy a cached render to `dest`; returns False on a miss."""
+        entry = self._entry_path(key)
+        dest = Path(dest)
+        try:
+            ensure_dir(dest.parent)
+            shutil.copyfile(entry, dest)
+            os.utime(entry)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key: str, src: str | Path) -> None:
+        entry = self._entry_path(key)
+        if entry.exists():
+            os.utime(entry)
+            return
+        ensure_dir(entry.parent)
+        fd, tmp_name = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_name)
+            os.replace(tmp_name, entry)
+        except BaseException:
+            try:
+                os.remove(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._size += entry.stat().st_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            target = int(self.max_bytes * _LOW_WATER)
+            for _, path, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._size = total
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    ensure_dir(path.parent)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def cached_sha256(path: str | Path, root: str | Path) -> str:
+    """sha256 of `path`, reused while its (path, size, mtime_ns) identity is unchanged.
+
+    The index lives in `<root>/file_hashes.json`; the digest itself stays
+    the authoritative key for everything derived from the file.
+    """
+    path = Path(path).resolve()
+    index_path = Path(root) / "file_hashes.json"
+    stat = path.stat()
+    try:
+        index: Dict[str, Dict] = json.loads(index_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        index = {}
+    entry = index.get(str(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+    digest = sha256_file(path)
+    index[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    _write_atomic(index_path, json.dumps(index, separators=(",", ":")).encode("utf-8"))
+    return digest
+
+
+# Bump when extraction output changes, so stale cached pages are not reused.
+EXTRACTION_FORMAT = 3
+
+
+class ExtractionCache:
+    """Extracted text, page spans and outline per PDF sha256, stored as gzipped JSON."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = ensure_dir(root)
+
+    def _entry_path(self, pdf_hash: str, keep_headers: bool) -> Path:
+        variant = "headers" if keep_headers else "clean"
+        return self.root / f"{pdf_hash}-{variant}-v{EXTRACTION_FORMAT}.json.gz"
+
+    def contains(self, pdf_hash: str, keep_headers: bool) -> bool:
+        return self._entry_path(pdf_hash, keep_headers).exists()
+
+    def get(self, pdf_hash: str, keep_headers: bool) -> Optional[ExtractedText]:
+        try:
+            with gzip.open(self._entry_path(pdf_hash, keep_headers), "rb") as f:
+                payload = json.loads(f.read().decode("utf-8"))
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        return ExtractedText.from_payload(payload)
+
+    def put(self, pdf_hash: str, keep_headers: bool, extraction: ExtractedText) -> None:
+        payload = json.dumps(
+            extraction.to_payload(), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        _write_atomic(self._entry_path(pdf_hash, keep_headers), gzip.compress(payload))
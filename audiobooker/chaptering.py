@@ -1,77 +1,207 @@
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .chunking import estimate_minutes, word_count
+from .pdf_to_text import ExtractedText
 
 
-@dataclass
 class Chapter:
-    title: str
-    start_char: int
-    end_char: int
-    text: str
-    words: int
-    est_minutes: float
+    """A chapter as a span of the book text.
 
+    `text` is sliced from the shared `source` buffer when it is read, unless
+    it was given explicitly, so chapters do not hold a second copy of the book.
+    """
 
-_HEADING_PATTERNS = [
-    re.compile(r"^\s*chapter\s+\d+[\.\: ]", re.IGNORECASE),
-    re.compile(r"^\s*chapter\s+[ivxlcdm]+[\.\: ]", re.IGNORECASE),
-    re.compile(r"^\s*chapter\s+[a-z]+[\.\: ]", re.IGNORECASE),
-    re.compile(r"^\s*part\s+[ivxlcdm]+[\.\: ]", re.IGNORECASE),
-    re.compile(r"^\s*part\s+\d+[\.\: ]", re.IGNORECASE),
-    re.compile(r"^\s*\d+\.\s+\S+"),
-]
+    __slots__ = ("title", "start_char", "end_char", "words", "est_minutes", "source", "_text")
+
+    def __init__(
+        self,
+        title: str,
+        start_char: int,
+        end_char: int,
+        text: Optional[str] = None,
+        words: int = 0,
+        est_minutes: float = 0.0,
+        source: Optional[str] = None,
+    ) -> None:
+        self.title = title
+        self.start_char = start_char
+        self.end_char = end_char
+        self.words = words
+        self.est_minutes = est_minutes
+        self.source = source
+        self._text = text
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        if self.source is None:
+            return ""
+        return self.source[self.start_char : self.end_char].strip()
+
+    def to_dict(self) -> Dict:
+        return {
+            "title": self.title,
+            "start_char": self.start_char,
+            "end_char": self.end_char,
+            "words": self.words,
+            "est_minutes": self.est_minutes,
+        }
+
+    def without_text(self) -> Chapter:
+        return Chapter(self.title, self.start_char, self.end_char, "", self.words, self.est_minutes)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chapter):
+            return NotImplemented
+        return (self.to_dict(), self.text) == (other.to_dict(), other.text)
+
+    def __repr__(self) -> str:
+        return (
+            f"Chapter(title={self.title!r}, start_char={self.start_char}, "
+            f"end_char={self.end_char}, words={self.words})"
+        )
+
+
+# One pattern for every heading style ("Chapter 12.", "CHAPTER IV:", "Chapter
+# One Begins", "Part II.", "Part 3:", "12. Title"). Anchored at line starts and
+# kept within a line, so a single scan of the book finds every heading.
+_HEADING_RE = re.compile(
+    r"^[^\S\n]*(?:"
+    r"(?:chapter[^\S\n]+(?:\d+|[ivxlcdm]+|[a-z]+)|part[^\S\n]+(?:[ivxlcdm]+|\d+))"
+    r"(?:[\.\:]| (?=[^\S\n]*\S))"
+    r"|\d+\.[^\S\n]+\S)",
+    re.IGNORECASE | re.MULTILINE,
+)
 
 
 def _is_heading(line: str) -> bool:
-    if len(line) > 80:
-        return False
-    for pattern in _HEADING_PATTERNS:
-        if pattern.match(line):
-            return True
-    return False
+    return len(line) <= 80 and _HEADING_RE.match(line) is not None
+
+
+def _find_headings(text: str) -> List[Tuple[int, str]]:
+    headings: List[Tuple[int, str]] = []
+    for match in _HEADING_RE.finditer(text):
+        start = match.start()
+        end = text.find("\n", start)
+        line = text[start : end if end != -1 else len(text)].strip()
+        if len(line) <= 80:
+            headings.append((start, line))
+    return headings
+
+
+def _chapters_at(text: str, headings: List[Tuple[int, str]]) -> List[Chapter]:
+    chapters: List[Chapter] = []
+    for i, (start_char, title) in enumerate(headings):
+        end_char = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        chapters.append(_chapter(title, start_char, end_char, text[start_char:end_char].strip(), text))
+    return chapters
 
 
 def detect_chapters(text: str) -> List[Chapter]:
-    lines = text.splitlines()
-    offsets = []
-    cursor = 0
-    for line in lines:
-        offsets.append(cursor)
-        cursor += len(line) + 1
+    return _chapters_at(text, _find_headings(text))
+
 
-    headings = []
-    for idx, line in enumerate(lines):
-        if _is_heading(line.strip()):
-            headings.append((idx, line.strip()))
+def chapters_from_outline(extraction: ExtractedText) -> List[Chapter]:
+    """Chapters from the PDF's top-level bookmarks.
 
-    if not headings:
+    Each entry starts at the line holding its title when that is found on
+    its page, and at the top of the page otherwise. Text before the first
+    entry is dropped, as it is for detected headings. An entry for a page
+    without text (a cover, a plate) lands on the next page's offset; the
+    entry that follows it there takes its place, and entries left with no
+    text are dropped.
+    """
+    if not extraction.outline:
         return []
+    text = extraction.full_text
+    lowered = text.lower()
+    offsets = [start for start, _ in extraction.page_spans]
+    top = min(level for level, _, _ in extraction.outline)
+    headings: List[Tuple[int, str]] = []
+    for level, title, page in extraction.outline:
+        if level != top or not title or not 1 <= page <= len(offsets):
+            continue
+        page_start = min(offsets[page - 1], len(text))
+        page_end = min(offsets[page], len(text)) if page < len(offsets) else len(text)
+        start_char = page_start
+        found = lowered.find(title.lower(), page_start, page_end)
+        if found != -1:
+            start_char = max(page_start, text.rfind("\n", page_start, found) + 1)
+        if headings and start_char < headings[-1][0]:
+            continue
+        if headings and start_char == headings[-1][0]:
+            headings.pop()
+        headings.append((start_char, title))
+    return [chapter for chapter in _chapters_at(text, headings) if chapter.text]
 
-    chapters: List[Chapter] = []
-    for i, (line_idx, title) in enumerate(headings):
-        start_char = offsets[line_idx]
-        if i + 1 < len(headings):
-            end_char = offsets[headings[i + 1][0]]
-        else:
-            end_char = len(text)
-        chapter_text = text[start_char:end_char].strip()
-        words = word_count(chapter_text)
-        chapters.append(
-            Chapter(
-                title=title,
-                start_char=start_char,
-                end_char=end_char,
-                text=chapter_text,
-                words=words,
-                est_minutes=estimate_minutes(words),
-            )
-        )
-    return chapters
+
+def _chapter(
+    title: str,
+    start_char: int,
+    end_char: int,
+    text: str,
+    source: Optional[str] = None,
+) -> Chapter:
+    """Build a chapter; with `source` given it keeps the span, not `text`."""
+    words = word_count(text)
+    return Chapter(
+        title=title,
+        start_char=start_char,
+        end_char=end_char,
+        text=None if source is not None else text,
+        words=words,
+        est_minutes=estimate_minutes(words),
+        source=source,
+    )
+
+
+def iter_chapters(pages: Iterable[str], mode: str = "auto") -> Iterator[Chapter]:
+    """Yield the chapters `build_chapters` would find in the joined pages, as they complete.
+
+    Only the chapter being read is kept in memory. Text before the first
+    heading is buffered until a heading shows up; if none ever does, the
+    whole book falls back to word-count sections as in `build_chapters`.
+    """
+    if mode != "auto":
+        text = "\n\n".join(p for p in pages if p.strip())
+        text = re.sub(r"\n{3,}", "\n\n", text).strip()
+        yield from build_chapters(text, mode)
+        return
+
+    cursor = 0
+    preamble: Optional[List[str]] = []
+    current: Optional[Tuple[str, int, List[str]]] = None
+    first_page = True
+    for page in pages:
+        page = page.strip()
+        if not page:
+            continue
+        lines = page.split("\n")
+        if not first_page:
+            lines = [""] + lines
+        first_page = False
+        for line in lines:
+            offset = cursor
+            cursor += len(line) + 1
+            if _is_heading(line.strip()):
+                if current is not None:
+                    title, start_char, body = current
+                    yield _chapter(title, start_char, offset, "\n".join(body).strip())
+                preamble = None
+                current = (line.strip(), offset, [line])
+            elif current is not None:
+                current[2].append(line)
+            else:
+                preamble.append(line)
+    if current is not None:
+        title, start_char, body = current
+        yield _chapter(title, start_char, max(cursor - 1, start_char), "\n".join(body).strip())
+    elif preamble:
+        yield from segment_by_word_count("\n".join(preamble))
 
 
 def segment_by_word_count(text: str, min_words: int = 1500, max_words: int = 3000) -> List[Chapter]:
@@ -90,35 +220,15 @@ def segment_by_word_count(text: str, min_words: int = 1500, max_words: int = 300
         if len(current_words) >= max_words:
             end_char = end
             chapter_text = text[start_char:end_char].strip()
-            chapter_words = word_count(chapter_text)
-            chapters.append(
-                Chapter(
-                    title=f"Section {len(chapters) + 1}",
-                    start_char=start_char,
-                    end_char=end_char,
-                    text=chapter_text,
-                    words=chapter_words,
-                    est_minutes=estimate_minutes(chapter_words),
-                )
-            )
+            chapters.append(_chapter(f"Section {len(chapters) + 1}", start_char, end_char, chapter_text, text))
             start_char = end_char
             current_words = []
         cursor = idx
 
     if start_char < len(text):
         chapter_text = text[start_char:].strip()
-        chapter_words = word_count(chapter_text)
-        if chapter_words:
-            chapters.append(
-                Chapter(
-                    title=f"Section {len(chapters) + 1}",
-                    start_char=start_char,
-                    end_char=len(text),
-                    text=chapter_text,
-                    words=chapter_words,
-                    est_minutes=estimate_minutes(chapter_words),
-                )
-            )
+        if word_count(chapter_text):
+            chapters.append(_chapter(f"Section {len(chapters) + 1}", start_char, len(text), chapter_text, text))
     return chapters
 
 
@@ -146,17 +256,7 @@ def build_chapters(text: str, mode: str) -> List[Chapter]:
             start_char = text.find(part, cursor)
             end_char = start_char + len(part)
             cursor = end_char
-            words = word_count(part)
-            chapters.append(
-                Chapter(
-                    title=f"Page {idx}",
-                    start_char=start_char,
-                    end_char=end_char,
-                    text=part,
-                    words=words,
-                    est_minutes=estimate_minutes(words),
-                )
-            )
+            chapters.append(_chapter(f"Page {idx}", start_char, end_char, part, text))
         return chapters
 
     detected = detect_chapters(text)
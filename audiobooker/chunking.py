@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, List
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
 
 
 _ABBREVIATIONS = {
@@ -18,23 +19,64 @@ _ABBREVIATIONS = {
     "etc.",
 }
 
-
-def _protect_abbreviations(text: str) -> str:
-    for abbr in _ABBREVIATIONS:
-        pattern = re.compile(re.escape(abbr), re.IGNORECASE)
-        text = pattern.sub(lambda m: m.group(0).replace(".", "<prd>"), text)
-    return text
-
-
-def _restore_abbreviations(text: str) -> str:
-    return text.replace("<prd>", ".")
+ABBREVIATIONS: Dict[str, FrozenSet[str]] = {
+    "en": frozenset(_ABBREVIATIONS),
+    "de": frozenset({"dr.", "prof.", "hr.", "fr.", "nr.", "str.", "ca.", "bzw.", "usw.", "vgl.", "z.b.", "d.h.", "u.a."}),
+    "fr": frozenset({"m.", "mme.", "mlle.", "dr.", "prof.", "etc.", "cf.", "p.ex.", "env.", "av."}),
+    "es": frozenset({"sr.", "sra.", "srta.", "dr.", "dra.", "prof.", "ud.", "uds.", "etc.", "p.ej."}),
+    "it": frozenset({"sig.", "sig.ra.", "dott.", "prof.", "ecc.", "es.", "pag."}),
+    "pt": frozenset({"sr.", "sra.", "dr.", "dra.", "prof.", "etc.", "p.ex.", "pág."}),
+}
 
 
-def _split_sentences(text: str) -> List[str]:
-    text = _protect_abbreviations(text)
-    parts = re.split(r"(?<=[.!?])\s+", text)
-    parts = [_restore_abbreviations(p).strip() for p in parts if p.strip()]
-    return parts
+@lru_cache(maxsize=None)
+def _boundary_pattern(lang: str) -> re.Pattern:
+    """One pattern matching every sentence boundary: [.!?] plus the following whitespace.
+
+    A period that ends an abbreviation is not a boundary. English keeps the
+    original suffix matching ("items." counts as "ms."), so existing chunk
+    texts and their synthesis fingerprints stay the same; the other
+    languages only match whole words.
+    """
+    abbreviations = ABBREVIATIONS.get(lang, ABBREVIATIONS["en"])
+    prefix = "" if lang not in ABBREVIATIONS or lang == "en" else r"\b"
+    guards = "".join(
+        f"(?<!{prefix}{re.escape(abbr)})" for abbr in sorted(abbreviations) if abbr.endswith(".")
+    )
+    return re.compile(rf"[.!?]{guards}(\s+)", re.IGNORECASE)
+
+
+def sentence_spans(text: str, lang: str = "en") -> List[Tuple[int, int]]:
+    """(start, end) offsets of the stripped sentences in `text`, in one scan."""
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for match in _boundary_pattern(lang).finditer(text):
+        spans.append((start, match.start(1)))
+        start = match.end(1)
+    spans.append((start, len(text)))
+    stripped: List[Tuple[int, int]] = []
+    for start, end in spans:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            stripped.append((start, end))
+    return stripped
+
+
+def _split_sentences(text: str, lang: str = "en") -> List[str]:
+    return [text[start:end] for start, end in sentence_spans(text, lang)]
+
+
+def split_sentences(text: str, lang: str = "en") -> List[Tuple[str, bool]]:
+    """Split text into sentences, flagging the ones that close a paragraph."""
+    sentences: List[Tuple[str, bool]] = []
+    for para in text.split("\n\n"):
+        parts = _split_sentences(para.strip(), lang)
+        for idx, sentence in enumerate(parts):
+            sentences.append((sentence, idx == len(parts) - 1))
+    return sentences
 
 
 def split_into_chunks(
@@ -42,46 +84,57 @@ def split_into_chunks(
     min_chars: int = 1500,
     max_chars: int = 3000,
     preserve_paragraph_gaps: bool = True,
+    lang: str = "en",
 ) -> List[str]:
     paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
     chunks: List[str] = []
-    current = ""
+    # Chunks are collected as lists of pieces with a running length and joined
+    # once, instead of growing a string sentence by sentence.
+    current: List[str] = []
+    current_len = 0
 
     def flush() -> None:
-        nonlocal current
-        if current.strip():
-            chunks.append(current.strip())
-            current = ""
+        nonlocal current, current_len
+        chunk = "".join(current).strip()
+        if chunk:
+            chunks.append(chunk)
+        current = []
+        current_len = 0
 
     for para in paragraphs:
-        sentences = _split_sentences(para)
-        for sentence in sentences:
+        for sentence in _split_sentences(para, lang):
             if not current:
-                current = sentence
-                continue
-            if len(current) + len(sentence) + 1 <= max_chars:
-                current = f"{current} {sentence}"
+                current = [sentence]
+                current_len = len(sentence)
+            elif current_len + len(sentence) + 1 <= max_chars:
+                current += [" ", sentence]
+                current_len += len(sentence) + 1
             else:
                 flush()
-                current = sentence
-        current = f"{current}\n\n"
+                current = [sentence]
+                current_len = len(sentence)
+        current.append("\n\n")
+        current_len += 2
 
     flush()
 
     merged: List[str] = []
-    buffer = ""
+    buffer: List[str] = []
+    buffer_len = 0
     joiner = "\n\n" if preserve_paragraph_gaps else " "
     for chunk in chunks:
         if not buffer:
-            buffer = chunk
-            continue
-        if len(buffer) < min_chars:
-            buffer = f"{buffer}{joiner}{chunk}"
+            buffer = [chunk]
+            buffer_len = len(chunk)
+        elif buffer_len < min_chars:
+            buffer += [joiner, chunk]
+            buffer_len += len(joiner) + len(chunk)
         else:
-            merged.append(buffer.strip())
-            buffer = chunk
+            merged.append("".join(buffer).strip())
+            buffer = [chunk]
+            buffer_len = len(chunk)
     if buffer:
-        merged.append(buffer.strip())
+        merged.append("".join(buffer).strip())
     return merged
 
 
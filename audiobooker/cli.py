@@ -2,23 +2,44 @@ from __future__ import annotations
 
 import argparse
 import json
+import subprocess
 import sys
 import time
-import wave
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .audio_merge import concat_audio
-from .chaptering import Chapter, build_chapters
+from .audio_merge import assemble_copy, concat_audio, encode_pcm
+from .cache import AudioCache, ExtractionCache, cached_sha256
+from .chaptering import Chapter, build_chapters, chapters_from_outline, iter_chapters
 from .chunking import split_into_chunks
-from .manifest import ChunkRecord, create_manifest, load_manifest, save_manifest
-from .pdf_to_text import extract_text
-from .tts_piper import DEFAULT_PIPER_VOICE, synthesize as piper_synthesize
-from .tts_xtts import synthesize as xtts_synthesize
+from .dsp import numpy_available
+from .incremental import relocate_renders, split_into_chunks_aligned
+from .loudness import measure_wav, static_gain
+from .mastering import SETTINGS as MASTERING_SETTINGS, master_chunks, master_to_wav, mastered_loudness, scaled_pcm16
+from .manifest import ChunkRecord, Manifest, create_manifest, load_manifest
+from .pcm import concat_wavs, read_wav_info, write_silence_wav
+from .pdf_to_text import ExtractedText, extract_text, stream_pages
+from .render import ChunkRenderer
+from .seams import join_trimmed, speech_bounds
+from .scheduler import BackgroundPool, ChunkJob, run_chunk_jobs
+from .tts_piper import (
+    DEFAULT_PIPER_VOICE,
+    PiperOnnxEngine,
+    PiperPool,
+    resolve_model,
+)
+from .tts_xtts import (
+    XTTS_MODEL_NAME,
+    get_engine as get_xtts_engine,
+    release_engines as release_xtts_engines,
+)
 from .utils import (
+    default_cache_dir,
     ensure_dir,
     ffmpeg_exists,
+    fingerprint,
     naturalize_tts_text,
+    safe_remove,
     sanitize_filename,
     sha256_file,
 )
@@ -47,29 +68,43 @@ def _chapter_index(chapters: List[Chapter], out_dir: Path) -> None:
     (out_dir / "chapter_index.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
 
 
-def _chapters_from_pages(pages: List[str]) -> List[Chapter]:
-    chapters: List[Chapter] = []
+def _page_chapter(idx: int, start_char: int, page: str, source: Optional[str] = None) -> Chapter:
+    words = len(page.split())
+    return Chapter(
+        title=f"Page {idx}",
+        start_char=start_char,
+        end_char=start_char + len(page),
+        text=None if source is not None else page,
+        words=words,
+        est_minutes=round(words / 150, 2) if words else 0.0,
+        source=source,
+    )
+
+
+def _iter_page_chapters(pages: Iterable[str]) -> Iterator[Chapter]:
+    # Offsets follow `from_pages`, so they index the book's full text.
     cursor = 0
-    full_text = "\n\n".join(pages)
     for idx, page in enumerate(pages, start=1):
         page = page.strip()
         if not page:
             continue
-        start_char = full_text.find(page, cursor)
-        end_char = start_char + len(page)
-        cursor = end_char
-        words = len(page.split())
-        chapters.append(
-            Chapter(
-                title=f"Page {idx}",
-                start_char=start_char,
-                end_char=end_char,
-                text=page,
-                words=words,
-                est_minutes=round(words / 150, 2) if words else 0.0,
-            )
-        )
-    return chapters
+        yield _page_chapter(idx, cursor, page)
+        cursor += len(page) + 2
+
+
+def _chapters_from_pages(extraction: ExtractedText) -> List[Chapter]:
+    return [
+        _page_chapter(idx, start, extraction.full_text[start:end], extraction.full_text)
+        for idx, (start, end) in enumerate(extraction.page_spans, start=1)
+        if end > start
+    ]
+
+
+def _remember_first_page(pages: Iterable[str], first_pages: List[str]) -> Iterator[str]:
+    for page in pages:
+        if not first_pages:
+            first_pages.append(page)
+        yield page
 
 
 def _detect_author(pages: List[str]) -> Optional[str]:
@@ -87,39 +122,6 @@ def _detect_author(pages: List[str]) -> Optional[str]:
     return None
 
 
-def _concat_wav_python(wav_paths: List[Path], output_path: Path) -> None:
-    import wave
-
-    if not wav_paths:
-        return
-    with wave.open(str(wav_paths[0]), "rb") as first:
-        params = first.getparams()
-        frames = [first.readframes(first.getnframes())]
-    for wav_path in wav_paths[1:]:
-        with wave.open(str(wav_path), "rb") as wf:
-            if wf.getparams() != params:
-                raise RuntimeError("WAV parameters mismatch; install ffmpeg for safe merging.")
-            frames.append(wf.readframes(wf.getnframes()))
-    with wave.open(str(output_path), "wb") as out:
-        out.setparams(params)
-        for chunk in frames:
-            out.writeframes(chunk)
-
-
-def _build_silence_wav(path: Path, duration_ms: int, sample_rate: int = 22050) -> Path:
-    ensure_dir(path.parent)
-    if path.exists():
-        return path
-    frame_count = int(sample_rate * (duration_ms / 1000.0))
-    silence = b"\x00\x00" * frame_count
-    with wave.open(str(path), "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)  # 16-bit PCM
-        wf.setframerate(sample_rate)
-        wf.writeframes(silence)
-    return path
-
-
 def _interleave_with_pause(paths: List[Path], pause_wav: Path) -> List[Path]:
     if len(paths) <= 1:
         return paths
@@ -131,6 +133,369 @@ def _interleave_with_pause(paths: List[Path], pause_wav: Path) -> List[Path]:
     return interleaved
 
 
+def _make_piper_engine(args: argparse.Namespace):
+    if args.piper_backend == "onnx":
+        return PiperOnnxEngine(
+            voice=args.voice,
+            speed=args.speed,
+            intra_op_threads=args.onnx_threads,
+            inter_op_threads=args.onnx_inter_threads,
+            workers=args.jobs,
+        )
+    return PiperPool(voice=args.voice, speed=args.speed, workers=args.jobs)
+
+
+def _voice_identity(args: argparse.Namespace, cache_dir: Optional[Path] = None) -> Tuple[str, str, str]:
+    """Return (engine, voice hash, speaker hash) for synthesis fingerprints and cache keys."""
+
+    def file_hash(path) -> str:
+        return cached_sha256(path, cache_dir) if cache_dir is not None else sha256_file(path)
+
+    speaker_hash = file_hash(args.speaker) if args.speaker else ""
+    if args.tts == "xtts":
+        return "xtts", get_xtts_engine(XTTS_MODEL_NAME).model_version(), speaker_hash
+    try:
+        voice_hash = file_hash(resolve_model(args.voice))
+    except FileNotFoundError:
+        voice_hash = args.voice
+    return f"piper-{args.piper_backend}", voice_hash, speaker_hash
+
+
+def _encode_chapter(
+    args: argparse.Namespace,
+    out_dir: Path,
+    chap_idx: int,
+    chapter_slug: str,
+    chunk_paths: List[Path],
+    stored: Optional[List[Optional[ChunkRecord]]] = None,
+) -> Tuple[Path, Dict[int, Dict]]:
+    """Encode one chapter; also returns chunk analysis measured here, keyed by chunk index."""
+    pause_ms = args.pause_ms if args.natural else 0
+    measured: Dict[int, Dict] = {}
+    records = stored or [None] * len(chunk_paths)
+
+    def analysis(field: str, measure) -> List:
+        values = []
+        for idx, (path, record) in enumerate(zip(chunk_paths, records), start=1):
+            value = getattr(record, field) if record else None
+            if value is None:
+                value = measure(path)
+                measured.setdefault(idx, {})[field] = value
+            values.append(value)
+        return values
+
+    bounds = analysis("trim", speech_bounds) if _trim_silence(args) else None
+    gaps = [pause_ms] * (len(chunk_paths) - 1)
+    gain_db: Optional[float] = None
+    premastered: Optional[Path] = None
+    if _static_loudness(args):
+        if args.natural:
+            # The gain is applied after the chain, so measure what the chain puts out.
+            keys = _mastered_keys(args, records, gaps)
+            stored_mastered = [record.mastered if record else None for record in records]
+            if all(m and key and m.get("key") == key for m, key in zip(stored_mastered, keys)):
+                measurements = [m["loudness"] for m in stored_mastered]
+            else:
+                if _numpy_mastering(args):
+                    # Keep the chain's output, so rendering below only applies the gain.
+                    premastered = out_dir / "chunks" / f".{chap_idx:02d}_{chapter_slug}.mastered.wav"
+                measurements = mastered_loudness(chunk_paths, gaps, bounds, premastered)
+                for idx, (key, loudness) in enumerate(zip(keys, measurements), start=1):
+                    if key:
+                        measured.setdefault(idx, {})["mastered"] = {"key": key, "loudness": loudness}
+        else:
+            measurements = analysis("loudness", measure_wav)
+        gain_db = static_gain(measurements, args.target_lufs)
+    chapter_file = out_dir / f"{chap_idx:02d}_{chapter_slug}.{args.format}"
+    if _numpy_mastering(args):
+        if args.format != "wav" and ffmpeg_exists():
+            if premastered is not None:
+                wav_format, blocks = scaled_pcm16(premastered, gain_db)
+            else:
+                wav_format, blocks = master_chunks(chunk_paths, gaps, gain_db or 0.0, bounds)
+            try:
+                encode_pcm(blocks, wav_format, chapter_file, args.format)
+            finally:
+                if premastered is not None:
+                    safe_remove(premastered)
+        else:
+            if args.format != "wav":
+                print("[WARN] ffmpeg not available; writing WAV chapter output instead.")
+            chapter_file = chapter_file.with_suffix(".wav")
+            master_to_wav(chunk_paths, chapter_file, gaps, gain_db or 0.0, bounds)
+    elif args.format == "wav" or not ffmpeg_exists():
+        if args.format != "wav":
+            print("[WARN] ffmpeg not available; writing WAV chapter output instead.")
+            chapter_file = chapter_file.with_suffix(".wav")
+        if bounds is not None:
+            join_trimmed(chunk_paths, chapter_file, bounds, gaps)
+        else:
+            concat_wavs(chunk_paths, chapter_file, gaps)
+    else:
+        chapter_inputs = chunk_paths
+        joined: Optional[Path] = None
+        if bounds is not None:
+            # Trim and join in Python so ffmpeg still runs once, over one input.
+            joined = out_dir / "chunks" / f".{chap_idx:02d}_{chapter_slug}.joined.wav"
+            join_trimmed(chunk_paths, joined, bounds, gaps)
+            chapter_inputs = [joined]
+        elif pause_ms > 0 and len(chunk_paths) > 1:
+            fmt = read_wav_info(chunk_paths[0]).format
+            pause_file = write_silence_wav(
+                ensure_dir(out_dir / "chunks" / "_pauses")
+                / f"pause_{pause_ms}ms_{fmt.sample_rate}hz_{fmt.channels}ch_{fmt.sample_width * 8}bit.wav",
+                pause_ms,
+                fmt,
+            )
+            chapter_inputs = _interleave_with_pause(chunk_paths, pause_file)
+        try:
+            concat_audio(
+                chapter_inputs,
+                chapter_file,
+                fmt=args.format,
+                normalize=args.normalize and gain_db is None,
+                natural=args.natural,
+                gain_db=gain_db,
+            )
+        finally:
+            if joined is not None:
+                safe_remove(joined)
+    return chapter_file, measured
+
+
+def _mastered_keys(
+    args: argparse.Namespace,
+    records: List[Optional[ChunkRecord]],
+    gaps: List[int],
+) -> List[Optional[str]]:
+    """Fingerprints of what each chunk's post-chain loudness depends on, None when unknown.
+
+    The chain carries its state over from the chunk before, so that render
+    counts too; each chunk is measured with the gap that follows it.
+    """
+    keys: List[Optional[str]] = []
+    for idx, record in enumerate(records):
+        previous = records[idx - 1] if idx else None
+        if record is None or not record.fingerprint or (idx and (previous is None or not previous.fingerprint)):
+            keys.append(None)
+            continue
+        keys.append(
+            fingerprint(
+                "mastered",
+                MASTERING_SETTINGS,
+                previous.fingerprint if previous else "",
+                record.fingerprint,
+                gaps[idx] if idx < len(gaps) else None,
+                _trim_silence(args),
+            )
+        )
+    return keys
+
+
+def _numpy_mastering(args: argparse.Namespace) -> bool:
+    """Whether the --natural chain runs in NumPy instead of as ffmpeg filters."""
+    if not args.natural or not numpy_available():
+        return False
+    if args.mastering == "numpy":
+        return True
+    return args.mastering == "auto" and (args.format == "wav" or not ffmpeg_exists())
+
+
+def _trim_silence(args: argparse.Namespace) -> bool:
+    """Whether chunk edge silence is trimmed so --natural pauses are exact."""
+    return args.natural and not args.keep_silence and numpy_available()
+
+
+def _static_loudness(args: argparse.Namespace) -> bool:
+    """Whether --normalize uses measured chunk loudness rather than ffmpeg's loudnorm."""
+    return args.normalize and args.format != "wav" and ffmpeg_exists() and numpy_available()
+
+
+def _extract_fp(args: argparse.Namespace, pdf_hash: str) -> str:
+    return fingerprint("extract", pdf_hash, args.keep_headers)
+
+
+def _extract_stage(
+    args: argparse.Namespace,
+    manifest: Manifest,
+    pdf_path: Path,
+    pdf_hash: str,
+    extraction_cache: Optional[ExtractionCache] = None,
+) -> Tuple[ExtractedText, str]:
+    stage_fp = _extract_fp(args, pdf_hash)
+    stored = manifest.stage_artifact("extract", stage_fp)
+    if stored is not None:
+        print("[INFO] PDF unchanged; reusing extracted text.")
+        return ExtractedText.from_payload(stored), stage_fp
+    extraction = None
+    if extraction_cache is not None:
+        extraction = extraction_cache.get(pdf_hash, args.keep_headers)
+    if extraction is not None:
+        print("[INFO] Reusing cached extraction of this PDF.")
+    else:
+        extraction = extract_text(
+            str(pdf_path), keep_headers=args.keep_headers, workers=args.extract_workers
+        )
+        if extraction_cache is not None:
+            extraction_cache.put(pdf_hash, args.keep_headers, extraction)
+    manifest.set_stage("extract", stage_fp, extraction.to_payload())
+    return extraction, stage_fp
+
+
+def _chapter_stage(
+    args: argparse.Namespace,
+    manifest: Manifest,
+    extraction: ExtractedText,
+    extract_fp: str,
+) -> Tuple[List[Chapter], str]:
+    stage_fp = fingerprint("chapter", extract_fp, args.chapters)
+    stored = manifest.stage_artifact("chapter", stage_fp)
+    if stored is not None:
+        return [Chapter(**c, source=extraction.full_text) for c in stored], stage_fp
+    chapters: List[Chapter] = []
+    if args.chapters == "per_page":
+        chapters = _chapters_from_pages(extraction)
+    elif args.chapters == "auto":
+        chapters = chapters_from_outline(extraction)
+        if chapters:
+            print(f"[INFO] Using the PDF outline: {len(chapters)} chapters.")
+    if not chapters and args.chapters != "per_page":
+        chapters = build_chapters(extraction.full_text, mode=args.chapters)
+    manifest.set_stage("chapter", stage_fp, [c.to_dict() for c in chapters])
+    return chapters, stage_fp
+
+
+def _text_language(args: argparse.Namespace) -> str:
+    """Language for sentence splitting and XTTS; `auto` means English."""
+    return "en" if args.lang == "auto" else args.lang
+
+
+def _chunk_stage(
+    args: argparse.Namespace,
+    manifest: Manifest,
+    chapter: Chapter,
+    chap_idx: int,
+    chapter_fp: str,
+    previous_chunks: Optional[List[str]] = None,
+) -> List[str]:
+    stage = f"chunk:{chap_idx}"
+    lang = _text_language(args)
+    stage_fp = fingerprint("chunk", chapter_fp, chap_idx, args.natural, lang)
+    stored = manifest.stage_artifact(stage, stage_fp)
+    if isinstance(stored, dict):
+        return stored["texts"] if stored["texts"] is not None else stored["raw"]
+    min_chars = 1100 if args.natural else 1500
+    max_chars = 2200 if args.natural else 3000
+    if previous_chunks:
+        raw_chunks = split_into_chunks_aligned(
+            chapter.text, previous_chunks, min_chars=min_chars, max_chars=max_chars, lang=lang
+        )
+    else:
+        raw_chunks = split_into_chunks(
+            chapter.text,
+            min_chars=min_chars,
+            max_chars=max_chars,
+            preserve_paragraph_gaps=True,
+            lang=lang,
+        )
+    if not args.natural:
+        manifest.set_stage(stage, stage_fp, {"natural": False, "raw": raw_chunks, "texts": None})
+        return raw_chunks
+    chunk_texts = [naturalize_tts_text(t) for t in raw_chunks]
+    manifest.set_stage(stage, stage_fp, {"natural": True, "raw": raw_chunks, "texts": chunk_texts})
+    return chunk_texts
+
+
+def _load_previous_chunks(
+    args: argparse.Namespace,
+    manifest: Manifest,
+    previous_titles: List[str],
+) -> Dict[int, List[str]]:
+    """Raw chunk texts of the previous run, keyed by its chapter index."""
+    stored: Dict[int, List[str]] = {}
+    for old_idx in range(1, len(previous_titles) + 1):
+        artifact = manifest.stage_artifact(f"chunk:{old_idx}", None)
+        if isinstance(artifact, dict) and artifact.get("natural") == args.natural:
+            stored[old_idx] = artifact["raw"]
+    return stored
+
+
+def _match_previous_chunks(
+    previous: Dict[int, List[str]],
+    previous_titles: List[str],
+    chap_idx: int,
+    title: str,
+) -> Optional[List[str]]:
+    """Claim the previous chunks of the chapter that `chap_idx` replaces.
+
+    Chapters are matched by title first and by position otherwise, so a
+    revision that adds or drops a chapter still lines up the rest.
+    """
+    old_idx = next((i for i in previous if previous_titles[i - 1] == title), None)
+    if old_idx is None and chap_idx in previous:
+        old_idx = chap_idx
+    if old_idx is None:
+        return None
+    return previous.pop(old_idx)
+
+
+def _record_chunk(manifest: Manifest, job: ChunkJob) -> None:
+    manifest.add_chunk(
+        ChunkRecord(
+            chapter_index=job.chapter_index,
+            chunk_index=job.chunk_index,
+            text_chars=len(job.text),
+            path=str(job.path),
+            fingerprint=job.fingerprint,
+            loudness=job.loudness,
+            trim=job.trim,
+        )
+    )
+
+
+def _stored_chunks(manifest: Manifest, chap_idx: int, count: int) -> List[Optional[ChunkRecord]]:
+    return [manifest.get_chunk(chap_idx, idx) for idx in range(1, count + 1)]
+
+
+def _merge_book(
+    args: argparse.Namespace,
+    out_dir: Path,
+    title: str,
+    chapters: List[Chapter],
+    chapter_outputs: List[Path],
+) -> Path:
+    merged_name = out_dir / f"{title}.{args.format}"
+    if args.format == "wav":
+        concat_wavs(chapter_outputs, merged_name)
+    elif ffmpeg_exists():
+        if args.assembly == "copy":
+            try:
+                return assemble_copy(
+                    chapter_outputs,
+                    merged_name,
+                    metadata_title=title,
+                    chapter_titles=[c.title for c in chapters],
+                )
+            except (subprocess.CalledProcessError, RuntimeError, ValueError) as exc:
+                print(f"[WARN] Stream-copy assembly failed ({exc}); re-encoding the book instead.")
+        durations = [c.est_minutes * 60 for c in chapters]
+        concat_audio(
+            chapter_outputs,
+            merged_name,
+            fmt=args.format,
+            # Chapters normalized from measured loudness already sit at the target.
+            normalize=args.normalize and not _static_loudness(args),
+            natural=args.natural,
+            metadata_title=title,
+            chapter_titles=[c.title for c in chapters],
+            chapter_durations=durations,
+        )
+    else:
+        merged_name = out_dir / f"{title}.wav"
+        concat_wavs(chapter_outputs, merged_name)
+    return merged_name
+
+
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(prog="audiobooker")
     parser.add_argument("--pdf", default="tightcorner.pdf")
@@ -139,48 +504,42 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument("--chapters", default="auto", choices=["auto", "per_page", "none"])
     parser.add_argument("--tts", default="piper", choices=["piper", "xtts"])
     parser.add_argument("--voice", default=DEFAULT_PIPER_VOICE)
+    parser.add_argument("--piper-backend", default="subprocess", choices=["subprocess", "onnx"])
+    parser.add_argument("--onnx-threads", type=int)
+    parser.add_argument("--onnx-inter-threads", type=int, default=1)
     parser.add_argument("--speaker")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--cache-max-mb", type=int, default=10240)
+    parser.add_argument("--no-cache", action="store_true")
     parser.add_argument("--speed", type=float, default=1.0)
     parser.add_argument("--format", default="mp3", choices=["mp3", "m4b", "wav"])
     parser.add_argument("--normalize", action="store_true")
+    parser.add_argument("--target-lufs", type=float, default=-24.0)
     parser.add_argument("--natural", action="store_true")
     parser.add_argument("--pause-ms", type=int, default=220)
+    parser.add_argument("--keep-silence", action="store_true")
+    parser.add_argument("--mastering", default="auto", choices=["auto", "ffmpeg", "numpy"])
+    parser.add_argument("--assembly", default="copy", choices=["copy", "reencode"])
     parser.add_argument("--keep-headers", action="store_true")
     parser.add_argument("--resume", action="store_true", default=True)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--encode-jobs", type=int, default=1)
+    parser.add_argument("--render-unit", default="chunk", choices=["chunk", "sentence"])
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--extract-workers", type=int, default=1)
     return parser.parse_args(argv)
 
 
-def main(argv: Optional[List[str]] = None) -> None:
-    args = parse_args(argv)
-    pdf_path = Path(args.pdf)
-    if not pdf_path.exists():
-        print(f"[ERROR] PDF not found: {pdf_path}")
-        sys.exit(1)
-
-    if args.speed < 0.75 or args.speed > 1.25:
-        print("[ERROR] --speed must be between 0.75 and 1.25")
-        sys.exit(1)
-    if args.pause_ms < 0 or args.pause_ms > 1500:
-        print("[ERROR] --pause-ms must be between 0 and 1500")
-        sys.exit(1)
-
-    out_dir = ensure_dir(args.out)
-    _write_notice(out_dir)
-    print("[WARN] Ensure you have the rights to convert this book.")
-
-    extraction = extract_text(str(pdf_path), keep_headers=args.keep_headers)
-    text = extraction.full_text
-
-    if not text.strip():
-        print("[ERROR] No text extracted from PDF.")
-        sys.exit(1)
-
-    if args.chapters == "per_page":
-        chapters = _chapters_from_pages(extraction.pages)
-    else:
-        chapters = build_chapters(text, mode=args.chapters)
-    _chapter_index(chapters, out_dir)
-
+def _build_book(
+    args: argparse.Namespace,
+    pdf_path: Path,
+    pdf_hash: str,
+    out_dir: Path,
+    cache_dir: Path,
+    extraction_cache: Optional[ExtractionCache],
+    manifest: Manifest,
+) -> Tuple[Optional[Path], Optional[str]]:
+    """Run every stage for one book; returns the merged output and the detected author."""
     settings = {
         "lang": args.lang,
         "chapters": args.chapters,
@@ -193,136 +552,378 @@ def main(argv: Optional[List[str]] = None) -> None:
         "natural": str(args.natural),
         "pause_ms": str(args.pause_ms),
     }
+    previous_titles = [c["title"] for c in manifest.chapters]
+    previous_chunks: Dict[int, List[str]] = {}
+    # With the extraction already stored there is nothing left to stream.
+    streaming = (
+        args.stream
+        and manifest.stage_fingerprint("extract") != _extract_fp(args, pdf_hash)
+        and not (extraction_cache and extraction_cache.contains(pdf_hash, args.keep_headers))
+    )
+    chapters: List[Chapter] = []
+    first_pages: List[str] = []
+    if streaming:
+        print("[INFO] Streaming extraction; synthesis starts with the first chapter.")
+        if manifest.pdf_hash not in ("", pdf_hash):
+            previous_chunks = _load_previous_chunks(args, manifest, previous_titles)
+    else:
+        previous_chapter_fp = manifest.stage_fingerprint("chapter")
+        extraction, extract_fp = _extract_stage(args, manifest, pdf_path, pdf_hash, extraction_cache)
+        if not extraction.full_text.strip():
+            print("[ERROR] No text extracted from PDF.")
+            sys.exit(1)
+        first_pages = [extraction.page(0)] if extraction.page_spans else []
+        chapters, chapter_fp = _chapter_stage(args, manifest, extraction, extract_fp)
+        del extraction
+        _chapter_index(chapters, out_dir)
+        if previous_chapter_fp is not None and previous_chapter_fp != chapter_fp:
+            previous_chunks = _load_previous_chunks(args, manifest, previous_titles)
+        manifest.set_source(str(pdf_path), pdf_hash, settings, chapters)
 
-    manifest = None
-    if args.resume:
-        existing = load_manifest(out_dir)
-        current_hash = sha256_file(pdf_path)
-        if existing and existing.pdf_hash == current_hash and existing.settings == settings:
-            manifest = existing
-    if manifest is None:
-        manifest = create_manifest(str(pdf_path), out_dir, settings, chapters)
-
-    chapter_outputs: List[Path] = []
     merged_output: Optional[Path] = None
 
-    start_time = time.time()
-    for chap_idx, chapter in enumerate(chapters, start=1):
-        chapter_slug = sanitize_filename(chapter.title)
-        chapter_dir = ensure_dir(out_dir / "chunks" / f"{chap_idx:02d}_{chapter_slug}")
-        chunk_texts = split_into_chunks(
-            chapter.text,
-            min_chars=1100 if args.natural else 1500,
-            max_chars=2200 if args.natural else 3000,
-            preserve_paragraph_gaps=True,
-        )
-        chunk_paths: List[Path] = []
-
-        print(f"[INFO] Chapter {chap_idx}/{len(chapters)}: {chapter.title}")
-        for chunk_idx, chunk_text in enumerate(chunk_texts, start=1):
-            if args.natural:
-                chunk_text = naturalize_tts_text(chunk_text)
-            chunk_path = chapter_dir / f"{chunk_idx:04d}.wav"
-            chunk_paths.append(chunk_path)
-            if chunk_path.exists():
-                if not any(
-                    c.chapter_index == chap_idx and c.chunk_index == chunk_idx
-                    for c in manifest.chunks
-                ):
-                    manifest.chunks.append(
-                        ChunkRecord(
-                            chapter_index=chap_idx,
-                            chunk_index=chunk_idx,
-                            text_chars=len(chunk_text),
-                            path=str(chunk_path),
-                        )
-                    )
-                    save_manifest(out_dir, manifest)
-                continue
+    audio_cache: Optional[AudioCache] = None
+    if not args.no_cache:
+        audio_cache = AudioCache(cache_dir / "audio", max_bytes=args.cache_max_mb * 1024 * 1024)
 
-            print(f"[INFO]  Chunk {chunk_idx}/{len(chunk_texts)}")
-            if args.tts == "piper":
-                piper_synthesize(
+    piper_engine = None
+    xtts_engine = None
+    xtts_language = _text_language(args)
+
+    def synthesize_text(chunk_text: str, path: Path) -> None:
+        if piper_engine is not None:
+            piper_engine.synthesize(chunk_text, path)
+        else:
+            xtts_engine.synthesize(
+                chunk_text,
+                path,
+                language=xtts_language,
+                speaker_wav=args.speaker,
+                speed=args.speed,
+                cache_dir=cache_dir,
+            )
+
+    # Renders from earlier runs by synthesis fingerprint, so a revision that
+    # shifts chunks around can move their audio instead of re-synthesizing it.
+    previous_renders: Dict[str, Path] = {}
+    for record in manifest.chunks:
+        if record.fingerprint and record.fingerprint not in previous_renders and Path(record.path).exists():
+            previous_renders[record.fingerprint] = Path(record.path)
+
+    chapter_chunks: Dict[int, List[Path]] = {}
+    chapter_chunk_fps: Dict[int, List[str]] = {}
+    chapter_slugs: Dict[int, str] = {}
+    revision = {"chunks": 0, "changed": 0, "relocated": 0}
+    renderer: Optional[ChunkRenderer] = None
+    voice_identity = _voice_identity(args, None if args.no_cache else cache_dir)
+
+    def plan(batch: List[Tuple[int, Chapter, str]]) -> List[Tuple[int, List[ChunkJob]]]:
+        """Work out which chunks of `batch` still need synthesis and prepare their paths."""
+        nonlocal renderer, piper_engine, xtts_engine
+        planned: List[Tuple[int, List[ChunkJob]]] = []
+        pending: List[ChunkJob] = []
+        moves: List[Tuple[Path, Path]] = []
+        relocated: List[ChunkJob] = []
+        for chap_idx, chapter, chapter_fp in batch:
+            chapter_slug = sanitize_filename(chapter.title)
+            chapter_slugs[chap_idx] = chapter_slug
+            previous = _match_previous_chunks(previous_chunks, previous_titles, chap_idx, chapter.title)
+            chunk_texts = _chunk_stage(args, manifest, chapter, chap_idx, chapter_fp, previous)
+            if not chunk_texts:
+                print(f"[WARN] Chapter {chap_idx}: {chapter.title} has no text; skipping it.")
+                continue
+            chapter_dir = ensure_dir(out_dir / "chunks" / f"{chap_idx:02d}_{chapter_slug}")
+            chunk_paths: List[Path] = []
+            chunk_fps: List[str] = []
+            jobs: List[ChunkJob] = []
+            for chunk_idx, chunk_text in enumerate(chunk_texts, start=1):
+                chunk_path = chapter_dir / f"{chunk_idx:04d}.wav"
+                # The voice model's hash, not its name, so a replaced model re-renders.
+                chunk_fp = fingerprint(
+                    "synth",
                     chunk_text,
-                    chunk_path,
-                    voice=args.voice,
-                    speed=args.speed,
+                    *voice_identity,
+                    args.speed,
+                    xtts_language,
+                    args.render_unit,
                 )
-            else:
-                xtts_synthesize(
-                    chunk_text,
-                    chunk_path,
-                    language="en" if args.lang == "auto" else args.lang,
-                    speaker_wav=args.speaker,
+                chunk_paths.append(chunk_path)
+                chunk_fps.append(chunk_fp)
+                job = ChunkJob(chap_idx, chunk_idx, chunk_text, chunk_path, fingerprint=chunk_fp)
+                record = manifest.get_chunk(chap_idx, chunk_idx)
+                if chunk_path.exists():
+                    # Files from runs that predate fingerprints are trusted, as before.
+                    if record is None or record.fingerprint in ("", chunk_fp):
+                        if record is None or record.fingerprint != chunk_fp:
+                            _record_chunk(manifest, job)
+                        continue
+                source = previous_renders.get(chunk_fp)
+                if source is not None and source != chunk_path and source.exists():
+                    moves.append((source, chunk_path))
+                    relocated.append(job)
+                    continue
+                pending.append(job)
+                jobs.append(job)
+            chapter_chunks[chap_idx] = chunk_paths
+            chapter_chunk_fps[chap_idx] = chunk_fps
+            planned.append((chap_idx, jobs))
+
+        # Relocate first: a stale file about to be removed may still be the source of a move.
+        relocate_renders(moves, out_dir / "chunks" / ".relocate")
+        for job in relocated:
+            _record_chunk(manifest, job)
+        for job in pending:
+            safe_remove(job.path)
+        # Later batches must not relocate from a path this batch has rewritten.
+        touched = {job.path for job in pending + relocated}
+        for chunk_fp, path in list(previous_renders.items()):
+            if path in touched:
+                del previous_renders[chunk_fp]
+        revision["chunks"] += sum(len(chapter_chunks[idx]) for idx, _ in planned)
+        revision["changed"] += len(pending)
+        revision["relocated"] += len(moves)
+
+        if pending:
+            if renderer is None:
+                renderer = ChunkRenderer(
+                    synthesize_text,
+                    voice_identity,
                     speed=args.speed,
+                    cache=audio_cache,
+                    unit=args.render_unit,
+                    lang=xtts_language,
+                    work_dir=out_dir / "chunks",
                 )
-
-            manifest.chunks.append(
-                ChunkRecord(
-                    chapter_index=chap_idx,
-                    chunk_index=chunk_idx,
-                    text_chars=len(chunk_text),
-                    path=str(chunk_path),
-                )
+            for _, jobs in planned:
+                remaining: List[ChunkJob] = []
+                for job in jobs:
+                    job.cache_key = renderer.chunk_key(job.text)
+                    if audio_cache is not None and audio_cache.get(job.cache_key, job.path):
+                        _record_chunk(manifest, job)
+                    else:
+                        remaining.append(job)
+                jobs[:] = remaining
+        total = "" if streaming else f"/{len(chapters)}"
+        for chap_idx, jobs in planned:
+            title = next(chapter.title for idx, chapter, _ in batch if idx == chap_idx)
+            print(
+                f"[INFO] Chapter {chap_idx}{total}: {title} "
+                f"({len(jobs)}/{len(chapter_chunks[chap_idx])} chunks to render)"
             )
-            save_manifest(out_dir, manifest)
 
-        chapter_inputs = chunk_paths
-        if args.natural and args.pause_ms > 0:
-            pause_file = _build_silence_wav(
-                out_dir / "chunks" / "_pauses" / f"pause_{args.pause_ms}ms.wav",
-                duration_ms=args.pause_ms,
-            )
-            chapter_inputs = _interleave_with_pause(chunk_paths, pause_file)
+        if any(jobs for _, jobs in planned) and piper_engine is None and xtts_engine is None:
+            if args.tts == "piper":
+                piper_engine = _make_piper_engine(args)
+            else:
+                xtts_engine = get_xtts_engine()
+                xtts_engine.warmup(language=xtts_language, speaker_wav=args.speaker, cache_dir=cache_dir)
+        return planned
+
+    revised = bool(previous_chunks)
+
+    def report_revision() -> None:
+        if not revised:
+            return
+        manifest.set_stats("revision", dict(revision))
+        print(
+            f"[INFO] PDF revision: {revision['changed']}/{revision['chunks']} chunks changed "
+            f"({revision['relocated']} unchanged chunks moved to new positions)."
+        )
 
-        chapter_file = out_dir / f"{chap_idx:02d}_{chapter_slug}.{args.format}"
-        if args.format == "wav":
-            _concat_wav_python(chapter_inputs, chapter_file)
+    def stream_work() -> Iterator[Tuple[int, List[ChunkJob]]]:
+        pages = _remember_first_page(
+            stream_pages(str(pdf_path), keep_headers=args.keep_headers), first_pages
+        )
+        if args.chapters == "per_page":
+            chapter_stream = _iter_page_chapters(pages)
         else:
-            if ffmpeg_exists():
-                concat_audio(
-                    chapter_inputs,
-                    chapter_file,
-                    fmt=args.format,
-                    normalize=args.normalize,
-                    natural=args.natural,
+            chapter_stream = iter_chapters(pages, mode=args.chapters)
+        for chap_idx, chapter in enumerate(chapter_stream, start=1):
+            # Keep only the chapter's metadata once its chunks are planned.
+            chapters.append(chapter.without_text())
+            yield from plan([(chap_idx, chapter, fingerprint("chapter", chapter.title, chapter.text))])
+
+    if streaming:
+        work: Iterable[Tuple[int, List[ChunkJob]]] = stream_work()
+    else:
+        work = plan([(idx, chapter, chapter_fp) for idx, chapter in enumerate(chapters, start=1)])
+        report_revision()
+
+    def synthesize_job(job: ChunkJob) -> None:
+        print(f"[INFO]  Chapter {job.chapter_index} chunk {job.chunk_index}/{len(chapter_chunks[job.chapter_index])}")
+        renderer.render(job)
+        if measure_loudness:
+            job.loudness = measure_wav(job.path)
+        if trim_silence:
+            job.trim = speech_bounds(job.path)
+
+    chapter_files: Dict[int, Path] = {}
+    encode_fps: Dict[int, str] = {}
+
+    measure_loudness = _static_loudness(args) and not args.natural
+    trim_silence = _trim_silence(args)
+
+    def chapter_done(chap_idx: int) -> None:
+        encode_fp = fingerprint(
+            "encode",
+            chapter_chunk_fps[chap_idx],
+            chapter_slugs[chap_idx],
+            args.format,
+            args.normalize,
+            args.target_lufs if _static_loudness(args) else None,
+            args.natural,
+            _numpy_mastering(args),
+            _trim_silence(args),
+            args.pause_ms,
+            ffmpeg_exists(),
+        )
+        encode_fps[chap_idx] = encode_fp
+        stored = manifest.stage_artifact(f"encode:{chap_idx}", encode_fp)
+        if stored and Path(stored["path"]).exists():
+            chapter_files[chap_idx] = Path(stored["path"])
+            return
+        # Encodes run on their own pool while later chapters are synthesized;
+        # results are recorded here and after synthesis, on this thread.
+        encoder.submit(
+            chap_idx,
+            _encode_chapter,
+            args,
+            out_dir,
+            chap_idx,
+            chapter_slugs[chap_idx],
+            list(chapter_chunks[chap_idx]),
+            _stored_chunks(manifest, chap_idx, len(chapter_chunks[chap_idx]))
+            if _static_loudness(args) or trim_silence
+            else None,
+        )
+        for idx, result in encoder.finished():
+            encoded(idx, result)
+
+    def encoded(chap_idx: int, result: Tuple[Path, Dict[int, Dict]]) -> None:
+        chapter_file, measured = result
+        for chunk_idx, fields in measured.items():
+            manifest.set_chunk_analysis(chap_idx, chunk_idx, fields)
+        chapter_files[chap_idx] = chapter_file
+        manifest.set_chapter_output(chap_idx, str(chapter_file))
+        manifest.set_stage(f"encode:{chap_idx}", encode_fps[chap_idx], {"path": str(chapter_file)})
+
+    with BackgroundPool(args.encode_jobs) as encoder:
+        try:
+            run_chunk_jobs(
+                work,
+                synthesize_job,
+                workers=args.jobs,
+                on_chunk_done=lambda job: _record_chunk(manifest, job),
+                on_chapter_done=chapter_done,
+                max_pending=args.jobs * 4 if streaming else None,
+            )
+        finally:
+            if piper_engine is not None:
+                piper_engine.close()
+            release_xtts_engines()
+            if renderer is not None:
+                renderer.close()
+        for idx, result in encoder.drain():
+            encoded(idx, result)
+    if streaming:
+        if not chapters:
+            print("[ERROR] No text extracted from PDF.")
+            sys.exit(1)
+        _chapter_index(chapters, out_dir)
+        manifest.set_source(str(pdf_path), pdf_hash, settings, chapters)
+        report_revision()
+    chapter_outputs = [chapter_files[idx] for idx in sorted(chapter_files)]
+    # Chapters without text were skipped and have no output to merge.
+    merged_chapters = [chapters[idx - 1] for idx in sorted(chapter_files)]
+    if renderer is not None:
+        dedup_stats = renderer.dedup_stats()
+        manifest.set_stats("dedup", dedup_stats)
+        for unit, unit_stats in dedup_stats.items():
+            if unit_stats["hits"]:
+                print(
+                    f"[INFO] Deduplicated {unit_stats['hits']}/{unit_stats['total']} {unit} "
+                    f"({unit_stats['hit_ratio']:.1%} of renders)."
                 )
-            else:
-                print("[WARN] ffmpeg not available; writing WAV chapter output instead.")
-                chapter_file = out_dir / f"{chap_idx:02d}_{chapter_slug}.wav"
-                _concat_wav_python(chunk_paths, chapter_file)
-
-        if str(chapter_file) not in manifest.chapter_outputs:
-            manifest.chapter_outputs.append(str(chapter_file))
-        save_manifest(out_dir, manifest)
-        chapter_outputs.append(chapter_file)
+    if audio_cache is not None and audio_cache.hits:
+        print(f"[INFO] Reused {audio_cache.hits} render(s) from the synthesis cache.")
 
     title = pdf_path.stem
-    author = _detect_author(extraction.pages)
+    author = _detect_author(first_pages)
 
     if chapter_outputs:
-        merged_name = out_dir / f"{title}.{args.format}"
-        if args.format == "wav":
-            _concat_wav_python(chapter_outputs, merged_name)
-        elif ffmpeg_exists():
-            durations = [c.est_minutes * 60 for c in chapters]
-            concat_audio(
-                chapter_outputs,
-                merged_name,
-                fmt=args.format,
-                normalize=args.normalize,
-                natural=args.natural,
-                metadata_title=title,
-                chapter_titles=[c.title for c in chapters],
-                chapter_durations=durations,
-            )
+        merge_fp = fingerprint(
+            "merge",
+            [encode_fps[idx] for idx in sorted(encode_fps)],
+            [c.title for c in merged_chapters],
+            title,
+            args.format,
+            args.assembly,
+            args.normalize,
+            _static_loudness(args),
+            args.natural,
+            ffmpeg_exists(),
+        )
+        stored = manifest.stage_artifact("merge", merge_fp)
+        if stored and Path(stored["path"]).exists():
+            merged_name = Path(stored["path"])
+            print("[INFO] Book unchanged; skipping merge.")
         else:
-            merged_name = out_dir / f"{title}.wav"
-            _concat_wav_python(chapter_outputs, merged_name)
-
+            merged_name = _merge_book(args, out_dir, title, merged_chapters, chapter_outputs)
+            manifest.set_stage("merge", merge_fp, {"path": str(merged_name)})
         manifest.merged_output = str(merged_name)
-        save_manifest(out_dir, manifest)
         merged_output = merged_name
+    return merged_output, author
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    pdf_path = Path(args.pdf)
+    if not pdf_path.exists():
+        print(f"[ERROR] PDF not found: {pdf_path}")
+        sys.exit(1)
+
+    if args.speed < 0.75 or args.speed > 1.25:
+        print("[ERROR] --speed must be between 0.75 and 1.25")
+        sys.exit(1)
+    if args.pause_ms < 0 or args.pause_ms > 1500:
+        print("[ERROR] --pause-ms must be between 0 and 1500")
+        sys.exit(1)
+    if args.cache_max_mb < 0:
+        print("[ERROR] --cache-max-mb must be zero or positive")
+        sys.exit(1)
+    if args.jobs < 1:
+        print("[ERROR] --jobs must be at least 1")
+        sys.exit(1)
+    if args.extract_workers < 1:
+        print("[ERROR] --extract-workers must be at least 1")
+        sys.exit(1)
+    if args.encode_jobs < 1:
+        print("[ERROR] --encode-jobs must be at least 1")
+        sys.exit(1)
+    if (args.onnx_threads is not None and args.onnx_threads < 1) or args.onnx_inter_threads < 1:
+        print("[ERROR] --onnx-threads and --onnx-inter-threads must be at least 1")
+        sys.exit(1)
+
+    out_dir = ensure_dir(args.out)
+    cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir()
+    _write_notice(out_dir)
+    print("[WARN] Ensure you have the rights to convert this book.")
+
+    start_time = time.time()
+    extraction_cache: Optional[ExtractionCache] = None
+    if args.no_cache:
+        pdf_hash = sha256_file(pdf_path)
+    else:
+        pdf_hash = cached_sha256(pdf_path, cache_dir)
+        extraction_cache = ExtractionCache(cache_dir / "extract")
+    manifest = load_manifest(out_dir) if args.resume else None
+    if manifest is None:
+        manifest = create_manifest(str(pdf_path), out_dir, {}, [], pdf_hash=pdf_hash)
+
+    try:
+        merged_output, author = _build_book(args, pdf_path, pdf_hash, out_dir, cache_dir, extraction_cache, manifest)
+    finally:
+        manifest.close()
 
     elapsed = time.time() - start_time
     print(f"[DONE] Completed in {elapsed:.1f}s")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from .utils import ensure_dir
+
+
+class _Render:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.path: Optional[Path] = None
+
+
+class RenderDeduplicator:
+    """Render each unique key once per run and copy the audio for repeats.
+
+    The first caller for a key renders it; concurrent or later callers with
+    the same key wait for that render and copy its WAV. With `store_dir`,
+    first renders are kept there under their key, so repeats still find them
+    after the caller's own output is gone. If the first render failed or
+    its audio is no longer there, the caller renders again itself.
+    """
+
+    def __init__(self, store_dir: Optional[Path] = None) -> None:
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._renders: Dict[str, _Render] = {}
+        self.total = 0
+        self.unique = 0
+        self.hits = 0
+
+    def render(self, key: str, output_path: Path, produce: Callable[[Path], None]) -> bool:
+        """Produce `output_path` for `key`; returns True when an earlier render was reused."""
+        with self._lock:
+            self.total += 1
+            entry = self._renders.get(key)
+            owner = entry is None
+            if owner:
+                entry = _Render()
+                self._renders[key] = entry
+                self.unique += 1
+        if owner:
+            target = output_path if self.store_dir is None else self.store_dir / f"{key}.wav"
+            try:
+                produce(target)
+                entry.path = target
+            finally:
+                entry.done.set()
+            if target != output_path:
+                ensure_dir(output_path.parent)
+                shutil.copyfile(target, output_path)
+            return False
+
+        entry.done.wait()
+        if entry.path is not None:
+            try:
+                ensure_dir(output_path.parent)
+                shutil.copyfile(entry.path, output_path)
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                return True
+        produce(output_path)
+        return False
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "total": self.total,
+                "unique": self.unique,
+                "hits": self.hits,
+                "hit_ratio": round(self.hits / self.total, 4) if self.total else 0.0,
+            }
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from .pcm import WAVE_FORMAT_IEEE_FLOAT, WavFormat, read_wav_info
+
+_SEGMENT = 1 << 16
+
+Biquad = Tuple[Sequence[float], Sequence[float]]
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def _run_biquad(b: Sequence[float], a: Sequence[float], x: List[float]) -> List[float]:
+    y: List[float] = []
+    x1 = x2 = y1 = y2 = 0.0
+    for sample in x:
+        out = b[0] * sample + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+        x2, x1, y2, y1 = x1, sample, y1, out
+        y.append(out)
+    return y
+
+
+def impulse_response(sections: Sequence[Biquad], length: int, gain: float = 1.0):
+    """Impulse response of cascaded biquads (normalized b, a), truncated to `length` samples.
+
+    Recursive filters are then applied as FIR convolutions, which NumPy can
+    do for a whole signal at once.
+    """
+    import numpy as np
+
+    response = [gain] + [0.0] * (length - 1)
+    for b, a in sections:
+        response = _run_biquad(b, a, response)
+    return np.array(response)
+
+
+def rbj_biquad(kind: str, frequency: float, sample_rate: int, q: float = 0.707) -> Biquad:
+    """Low/high-pass biquad from the Audio EQ Cookbook, as ffmpeg's lowpass/highpass use."""
+    w0 = 2 * math.pi * frequency / sample_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    a0 = 1 + alpha
+    if kind == "lowpass":
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+    else:
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+    return [v / a0 for v in b], [1.0, -2 * cos_w0 / a0, (1 - alpha) / a0]
+
+
+def fft_convolve(x, ir, full: bool = False):
+    """Convolve each channel (rows of `x`) with `ir` by overlap-add.
+
+    The output keeps x's length unless `full`, which adds the filter's tail.
+    """
+    import numpy as np
+
+    step = _SEGMENT - len(ir) + 1
+    ir_f = np.fft.rfft(ir, _SEGMENT)
+    out = np.zeros((x.shape[0], x.shape[1] + len(ir) - 1))
+    for start in range(0, x.shape[1], step):
+        block = np.fft.irfft(np.fft.rfft(x[:, start : start + step], _SEGMENT) * ir_f, _SEGMENT)
+        end = min(out.shape[1], start + _SEGMENT)
+        out[:, start:end] += block[:, : end - start]
+    return out if full else out[:, : x.shape[1]]
+
+
+def read_samples(path: str | Path, start: int = 0, frames: Optional[int] = None):
+    """WAV samples as a float (channels, frames) array scaled to [-1, 1], with the file's format.
+
+    `start` and `frames` select a range of frames instead of the whole file.
+    """
+    import numpy as np
+
+    info = read_wav_info(path)
+    fmt = info.format
+    start = min(start, info.frames)
+    count = info.frames - start if frames is None else min(frames, info.frames - start)
+    raw = np.fromfile(
+        str(path),
+        dtype=np.uint8,
+        count=count * fmt.block_align,
+        offset=info.data_offset + start * fmt.block_align,
+    )
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = raw.view("<f4" if fmt.sample_width == 4 else "<f8").astype(np.float64)
+    elif fmt.sample_width == 1:
+        samples = (raw.astype(np.float64) - 128.0) / 128.0
+    elif fmt.sample_width == 3:
+        wide = np.zeros((raw.size // 3, 4), dtype=np.uint8)
+        wide[:, 1:] = raw.reshape(-1, 3)
+        samples = wide.view("<i4").ravel() / float(1 << 31)
+    else:
+        dtype = {2: "<i2", 4: "<i4"}[fmt.sample_width]
+        samples = raw.view(dtype) / float(1 << (8 * fmt.sample_width - 1))
+    return samples.reshape(-1, fmt.channels).T, fmt
+
+
+def to_pcm16(samples) -> bytes:
+    """Interleave a (channels, frames) float array into 16-bit little-endian PCM."""
+    import numpy as np
+
+    scaled = np.clip(np.round(samples.T * 32767.0), -32768, 32767)
+    return scaled.astype("<i2").tobytes()
+
+
+def to_pcm(samples, fmt: WavFormat) -> bytes:
+    """Interleave a (channels, frames) float array into PCM of the given WAV format."""
+    import numpy as np
+
+    interleaved = samples.T.ravel()
+    if fmt.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return interleaved.astype("<f4" if fmt.sample_width == 4 else "<f8").tobytes()
+    if fmt.sample_width == 1:
+        return np.clip(np.round(interleaved * 128.0 + 128.0), 0, 255).astype(np.uint8).tobytes()
+    scale = float(1 << (8 * fmt.sample_width - 1))
+    ints = np.clip(np.round(interleaved * scale), -scale, scale - 1)
+    if fmt.sample_width == 3:
+        return ints.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return ints.astype({2: "<i2", 4: "<i4"}[fmt.sample_width]).tobytes()
+
+
+def pcm16_format(fmt: WavFormat) -> WavFormat:
+    return WavFormat(fmt.channels, fmt.sample_rate, 2)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import difflib
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from .chunking import split_into_chunks, split_sentences
+from .utils import ensure_dir
+
+
+def _units_to_text(units: Sequence[Tuple[str, bool]]) -> str:
+    parts: List[str] = []
+    for sentence, ends_paragraph in units:
+        parts.append(sentence)
+        parts.append("\n\n" if ends_paragraph else " ")
+    return "".join(parts).strip()
+
+
+def split_into_chunks_aligned(
+    text: str,
+    previous_chunks: Sequence[str],
+    min_chars: int = 1500,
+    max_chars: int = 3000,
+    lang: str = "en",
+) -> List[str]:
+    """Chunk `text` so that text unchanged since the previous run keeps its old chunks.
+
+    New and old sentences are aligned with difflib. Every previous chunk whose
+    sentences all survive unchanged (and contiguous) is kept verbatim, so its
+    synthesis fingerprint and audio stay valid; only the stretches of text
+    between kept chunks are chunked afresh.
+    """
+    if not previous_chunks:
+        return split_into_chunks(text, min_chars=min_chars, max_chars=max_chars, lang=lang)
+
+    new_units = split_sentences(text, lang)
+    old_sentences: List[str] = []
+    old_ranges: List[Tuple[int, int]] = []
+    for chunk in previous_chunks:
+        start = len(old_sentences)
+        old_sentences.extend(sentence for sentence, _ in split_sentences(chunk, lang))
+        old_ranges.append((start, len(old_sentences)))
+
+    matcher = difflib.SequenceMatcher(
+        None, old_sentences, [sentence for sentence, _ in new_units], autojunk=False
+    )
+    blocks = [b for b in matcher.get_matching_blocks() if b.size]
+
+    kept: List[Tuple[int, int, str]] = []
+    for chunk, (start, end) in zip(previous_chunks, old_ranges):
+        if start == end:
+            continue
+        for block in blocks:
+            if block.a <= start and end <= block.a + block.size:
+                new_start = block.b + (start - block.a)
+                kept.append((new_start, new_start + (end - start), chunk))
+                break
+
+    chunks: List[str] = []
+    cursor = 0
+    for new_start, new_end, chunk in kept:
+        if new_start < cursor:
+            continue
+        gap = _units_to_text(new_units[cursor:new_start])
+        if gap:
+            chunks.extend(split_into_chunks(gap, min_chars=min_chars, max_chars=max_chars, lang=lang))
+        chunks.append(chunk)
+        cursor = new_end
+    tail = _units_to_text(new_units[cursor:])
+    if tail:
+        chunks.extend(split_into_chunks(tail, min_chars=min_chars, max_chars=max_chars, lang=lang))
+    return chunks
+
+
+def relocate_renders(
+    moves: Sequence[Tuple[Path, Path]],
+    staging_dir: Path,
+) -> None:
+    """Place earlier renders at their new chunk paths, leaving the sources intact.
+
+    Sources are first linked (or copied) into `staging_dir` so that a chunk
+    file can be both the source of one move and the target of another.
+    """
+    if not moves:
+        return
+    ensure_dir(staging_dir)
+    staged: Dict[Path, Path] = {}
+    for idx, (source, _) in enumerate(moves):
+        if source in staged:
+            continue
+        target = staging_dir / f"{idx:06d}.wav"
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+        staged[source] = target
+    remaining = Counter(source for source, _ in moves)
+    for source, dest in moves:
+        ensure_dir(dest.parent)
+        remaining[source] -= 1
+        if remaining[source]:
+            shutil.copyfile(staged[source], dest)
+        else:
+            os.replace(staged[source], dest)
+    shutil.rmtree(staging_dir, ignore_errors=True)
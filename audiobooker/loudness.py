@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .dsp import fft_convolve, impulse_response, read_samples
+
+# BS.1770 gating blocks are 400 ms long with 75% overlap; they are built
+# from 100 ms sub-blocks. Block loudness is kept as a histogram of
+# `_BIN_LU` wide bins holding (count, summed energy), so measurements of
+# separate chunks can be merged and gated as one programme later.
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+_BIN_LU = 0.5
+
+
+@lru_cache(maxsize=8)
+def _k_weighting_ir(sample_rate: int):
+    """Impulse response of the BS.1770 K-weighting filter, truncated at 250 ms."""
+    # Pre-filter (high shelf) and RLB high-pass, derived for any sample rate
+    # as in libebur128.
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+    shelf_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_b = [1.0, -2.0, 1.0]
+    high_a = [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return impulse_response([(shelf_b, shelf_a), (high_b, high_a)], sample_rate // 4)
+
+
+def measure_wav(path: str | Path) -> Dict:
+    """Gating-block histogram and sample peak of one WAV, for `integrated_loudness`."""
+    samples, fmt = read_samples(path)
+    return measure_samples(samples, fmt.sample_rate)
+
+
+def measure_samples(samples, rate: int) -> Dict:
+    """`measure_wav` for a (channels, frames) float array already in memory."""
+    import numpy as np
+
+    peak = float(np.abs(samples).max()) if samples.size else 0.0
+    hop = int(round(rate * 0.1))
+    sub_blocks = samples.shape[1] // hop
+    if sub_blocks < 4:
+        return {"blocks": [], "peak": peak}
+    weighted = fft_convolve(samples, _k_weighting_ir(rate))
+    energy = (weighted[:, : sub_blocks * hop] ** 2).reshape(samples.shape[0], sub_blocks, hop).sum(axis=2).sum(axis=0)
+    blocks = (energy[:-3] + energy[1:-2] + energy[2:-1] + energy[3:]) / (4 * hop)
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    keep = loudness >= _ABSOLUTE_GATE
+    bins = np.floor(loudness[keep] / _BIN_LU).astype(np.int64)
+    counts = np.bincount(bins - bins.min(), minlength=1) if bins.size else np.zeros(0)
+    sums = np.bincount(bins - bins.min(), weights=blocks[keep], minlength=1) if bins.size else np.zeros(0)
+    offset = int(bins.min()) if bins.size else 0
+    histogram = [
+        [offset + int(i), int(counts[i]), float(f"{sums[i]:.7g}")] for i in np.flatnonzero(counts)
+    ]
+    return {"blocks": histogram, "peak": float(f"{peak:.7g}")}
+
+
+def integrated_loudness(measurements: Iterable[Optional[Dict]]) -> Optional[float]:
+    """Gated integrated loudness (LUFS) of the measured pieces played back to back."""
+    merged: Dict[int, List[float]] = {}
+    for measurement in measurements:
+        for bin_index, count, energy in (measurement or {}).get("blocks", []):
+            entry = merged.setdefault(bin_index, [0, 0.0])
+            entry[0] += count
+            entry[1] += energy
+    count = sum(c for c, _ in merged.values())
+    if not count:
+        return None
+    threshold = -0.691 + 10 * math.log10(sum(e for _, e in merged.values()) / count) + _RELATIVE_GATE
+    gated = [(c, e) for bin_index, (c, e) in merged.items() if (bin_index + 0.5) * _BIN_LU >= threshold]
+    count = sum(c for c, _ in gated)
+    if not count:
+        return None
+    return -0.691 + 10 * math.log10(sum(e for _, e in gated) / count)
+
+
+def static_gain(measurements: List[Optional[Dict]], target_lufs: float, ceiling_db: float = -1.0) -> float:
+    """Gain in dB that brings the pieces to `target_lufs` without pushing peaks above `ceiling_db`."""
+    loudness = integrated_loudness(measurements)
+    if loudness is None:
+        return 0.0
+    gain = target_lufs - loudness
+    peak = max((m or {}).get("peak", 0.0) for m in measurements)
+    if peak > 0:
+        gain = min(gain, ceiling_db - 20 * math.log10(peak))
+    return round(gain, 2)
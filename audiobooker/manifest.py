@@ -1,12 +1,48 @@
 from __future__ import annotations
 
 import json
+import os
+import sqlite3
+import threading
+import zlib
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from .chaptering import Chapter
-from .utils import sha256_file
+from .utils import safe_remove, sha256_file
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    chapter_index INTEGER NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    text_chars INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (chapter_index, chunk_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chapter_outputs (
+    chapter_index INTEGER PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    name TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    artifact BLOB
+);
+"""
+
+# Columns added after the first SQLite release; created on open when missing.
+_CHUNK_COLUMNS = {
+    "fingerprint": "TEXT NOT NULL DEFAULT ''",
+    "loudness": "TEXT",
+    "trim": "TEXT",
+    "mastered": "TEXT",
+}
 
 
 @dataclass
@@ -15,43 +51,286 @@ class ChunkRecord:
     chunk_index: int
     text_chars: int
     path: str
+    fingerprint: str = ""
+    # Gating-block histogram and peak from `loudness.measure_wav`.
+    loudness: Optional[Dict] = None
+    # [start, end) frames left after `seams.speech_bounds` trims edge silence.
+    trim: Optional[List[int]] = None
+    # {"key", "loudness"}: the chunk's loudness after the --natural chain, from
+    # `mastering.mastered_loudness`, and the fingerprint of what it depends on.
+    mastered: Optional[Dict] = None
+
+
+_CHUNK_FIELDS = "chapter_index, chunk_index, text_chars, path, fingerprint, loudness, trim, mastered"
+
+
+def _chunk_record(row: tuple) -> ChunkRecord:
+    return ChunkRecord(
+        *row[:5],
+        loudness=json.loads(row[5]) if row[5] else None,
+        trim=json.loads(row[6]) if row[6] else None,
+        mastered=json.loads(row[7]) if row[7] else None,
+    )
 
 
-@dataclass
 class Manifest:
-    pdf_path: str
-    pdf_hash: str
-    settings: Dict[str, str]
-    chapters: List[Dict]
-    chunks: List[ChunkRecord]
-    chapter_outputs: List[str]
-    merged_output: Optional[str]
+    """Resume state for one output dir, stored in SQLite.
+
+    Chunk records are keyed by (chapter, chunk), so lookups and appends are
+    single indexed statements instead of a rewrite of the whole manifest.
+    Every mutation commits on its own; with the WAL journal an interrupted
+    run leaves the database at its last completed write.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")}
+        for column, decl in _CHUNK_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} {decl}")
+        self._conn.commit()
+
+    def _get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def set_source(
+        self,
+        pdf_path: str,
+        pdf_hash: str,
+        settings: Dict[str, str],
+        chapters: List[Chapter],
+    ) -> None:
+        self._set_meta("pdf_path", pdf_path)
+        self._set_meta("pdf_hash", pdf_hash)
+        self._set_meta("settings", settings)
+        self._set_meta(
+            "chapters",
+            [
+                {
+                    "title": c.title,
+                    "start_char": c.start_char,
+                    "end_char": c.end_char,
+                    "words": c.words,
+                    "est_minutes": c.est_minutes,
+                }
+                for c in chapters
+            ],
+        )
+
+    @property
+    def pdf_path(self) -> str:
+        return self._get_meta("pdf_path", "")
+
+    @property
+    def pdf_hash(self) -> str:
+        return self._get_meta("pdf_hash", "")
+
+    @property
+    def settings(self) -> Dict[str, str]:
+        return self._get_meta("settings", {})
+
+    @property
+    def chapters(self) -> List[Dict]:
+        return self._get_meta("chapters", [])
+
+    @property
+    def merged_output(self) -> Optional[str]:
+        return self._get_meta("merged_output")
+
+    @merged_output.setter
+    def merged_output(self, value: Optional[str]) -> None:
+        self._set_meta("merged_output", value)
+
+    @property
+    def stats(self) -> Dict[str, Dict]:
+        return self._get_meta("stats", {})
+
+    def set_stats(self, key: str, value: Dict) -> None:
+        stats = self.stats
+        stats[key] = value
+        self._set_meta("stats", stats)
+
+    @property
+    def chunks(self) -> Tuple[ChunkRecord, ...]:
+        """Read-only snapshot of every chunk record; write through `add_chunk`."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_CHUNK_FIELDS} FROM chunks ORDER BY chapter_index, chunk_index"
+            ).fetchall()
+        return tuple(_chunk_record(row) for row in rows)
+
+    def get_chunk(self, chapter_index: int, chunk_index: int) -> Optional[ChunkRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_CHUNK_FIELDS} FROM chunks WHERE chapter_index = ? AND chunk_index = ?",
+                (chapter_index, chunk_index),
+            ).fetchone()
+        return _chunk_record(row) if row else None
+
+    def add_chunk(self, record: ChunkRecord) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO chunks ({_CHUNK_FIELDS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.chapter_index,
+                    record.chunk_index,
+                    record.text_chars,
+                    record.path,
+                    record.fingerprint,
+                    json.dumps(record.loudness) if record.loudness is not None else None,
+                    json.dumps(record.trim) if record.trim is not None else None,
+                    json.dumps(record.mastered) if record.mastered is not None else None,
+                ),
+            )
+
+    def set_chunk_analysis(self, chapter_index: int, chunk_index: int, fields: Dict[str, Any]) -> None:
+        """Store measurements (`loudness`, `trim`, `mastered`) taken after a chunk was recorded."""
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE chunks SET {columns} WHERE chapter_index = ? AND chunk_index = ?",
+                (*(json.dumps(value) for value in fields.values()), chapter_index, chunk_index),
+            )
+
+    @property
+    def chapter_outputs(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM chapter_outputs ORDER BY chapter_index"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def set_chapter_output(self, chapter_index: int, path: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chapter_outputs (chapter_index, path) VALUES (?, ?)",
+                (chapter_index, path),
+            )
+
+    def stage_fingerprint(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM stages WHERE name = ?", (name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def stage_artifact(self, name: str, fingerprint: Optional[str]) -> Optional[Any]:
+        """Return the stored output of stage `name` if it was built from `fingerprint`.
+
+        With `fingerprint=None` the last stored output is returned whatever its inputs.
+        """
+        with self._lock:
+            if fingerprint is None:
+                row = self._conn.execute(
+                    "SELECT artifact FROM stages WHERE name = ?", (name,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT artifact FROM stages WHERE name = ? AND fingerprint = ?",
+                    (name, fingerprint),
+                ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set_stage(self, name: str, fingerprint: str, artifact: Any = None) -> None:
+        blob = None
+        if artifact is not None:
+            blob = zlib.compress(json.dumps(artifact).encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (name, fingerprint, artifact) VALUES (?, ?, ?)",
+                (name, fingerprint, blob),
+            )
 
     def to_json(self) -> str:
-        payload = asdict(self)
-        payload["chunks"] = [asdict(c) for c in self.chunks]
+        payload = {
+            "pdf_path": self.pdf_path,
+            "pdf_hash": self.pdf_hash,
+            "settings": self.settings,
+            "chapters": self.chapters,
+            "chunks": [asdict(c) for c in self.chunks],
+            "chapter_outputs": self.chapter_outputs,
+            "merged_output": self.merged_output,
+            "stats": self.stats,
+        }
         return json.dumps(payload, indent=2)
 
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
 
 def manifest_path(out_dir: str | Path) -> Path:
+    return Path(out_dir) / "audiobook_manifest.sqlite3"
+
+
+def legacy_manifest_path(out_dir: str | Path) -> Path:
     return Path(out_dir) / "audiobook_manifest.json"
 
 
+def _remove_db(path: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        safe_remove(f"{path}{suffix}")
+
+
+def migrate_json_manifest(out_dir: str | Path) -> Optional[Manifest]:
+    """Import a legacy `audiobook_manifest.json` into the SQLite store."""
+    legacy = legacy_manifest_path(out_dir)
+    if not legacy.exists():
+        return None
+    data = json.loads(legacy.read_text(encoding="utf-8"))
+    target = manifest_path(out_dir)
+    staging = target.with_name(target.name + ".migrating")
+    _remove_db(staging)
+    manifest = Manifest(staging)
+    for key in ("pdf_path", "pdf_hash", "settings", "chapters", "merged_output", "stats"):
+        if key in data:
+            manifest._set_meta(key, data[key])
+    for chunk in data.get("chunks", []):
+        manifest.add_chunk(ChunkRecord(**chunk))
+    for chapter_output in data.get("chapter_outputs", []):
+        name = Path(chapter_output).name
+        index = int(name.split("_", 1)[0]) if name[:2].isdigit() else len(manifest.chapter_outputs) + 1
+        manifest.set_chapter_output(index, chapter_output)
+    with manifest._lock:
+        manifest._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    manifest.close()
+    _remove_db(target)
+    os.replace(staging, target)
+    _remove_db(staging)
+    os.replace(legacy, legacy.with_name(legacy.name + ".migrated"))
+    return Manifest(target)
+
+
 def load_manifest(out_dir: str | Path) -> Optional[Manifest]:
     path = manifest_path(out_dir)
-    if not path.exists():
-        return None
-    data = json.loads(path.read_text(encoding="utf-8"))
-    chunks = [ChunkRecord(**c) for c in data.get("chunks", [])]
-    return Manifest(
-        pdf_path=data["pdf_path"],
-        pdf_hash=data["pdf_hash"],
-        settings=data.get("settings", {}),
-        chapters=data.get("chapters", []),
-        chunks=chunks,
-        chapter_outputs=data.get("chapter_outputs", []),
-        merged_output=data.get("merged_output"),
-    )
+    if path.exists():
+        return Manifest(path)
+    return migrate_json_manifest(out_dir)
+
+
+def save_manifest(out_dir: str | Path, manifest: Manifest) -> None:
+    """Compatibility wrapper from the JSON manifest.
+
+    Every write is already committed; this only checkpoints the WAL.
+    """
+    with manifest._lock:
+        manifest._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
 
 
 def create_manifest(
@@ -59,29 +338,11 @@ def create_manifest(
     out_dir: str | Path,
     settings: Dict[str, str],
     chapters: List[Chapter],
+    pdf_hash: Optional[str] = None,
 ) -> Manifest:
-    data = Manifest(
-        pdf_path=pdf_path,
-        pdf_hash=sha256_file(pdf_path),
-        settings=settings,
-        chapters=[
-            {
-                "title": c.title,
-                "start_char": c.start_char,
-                "end_char": c.end_char,
-                "words": c.words,
-                "est_minutes": c.est_minutes,
-            }
-            for c in chapters
-        ],
-        chunks=[],
-        chapter_outputs=[],
-        merged_output=None,
-    )
-    save_manifest(out_dir, data)
-    return data
-
-
-def save_manifest(out_dir: str | Path, manifest: Manifest) -> None:
     path = manifest_path(out_dir)
-    path.write_text(manifest.to_json(), encoding="utf-8")
+    _remove_db(path)
+    data = Manifest(path)
+    data.set_source(pdf_path, pdf_hash or sha256_file(pdf_path), settings, chapters)
+    data._set_meta("merged_output", None)
+    return data
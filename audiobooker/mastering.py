@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import math
+from itertools import accumulate
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .dsp import fft_convolve, impulse_response, pcm16_format, rbj_biquad, read_samples, to_pcm, to_pcm16
+from .loudness import measure_samples
+from .pcm import WAVE_FORMAT_IEEE_FLOAT, WavFormat, WavWriter, read_wav_info
+from .resample import convert_samples
+from .seams import fade_edges
+from .utils import safe_remove
+
+# The --natural chain, matching the ffmpeg filters in `audio_merge.concat_audio`:
+# volume=-2dB, highpass=f=55, lowpass=f=9800,
+# acompressor=threshold=-22dB:ratio=1.8:attack=12:release=180, alimiter=limit=0.95.
+# A loudness gain is applied after the chain, so it does not move the
+# compressor threshold and lands where it was measured.
+VOLUME_DB = -2.0
+HIGHPASS_HZ = 55.0
+LOWPASS_HZ = 9800.0
+THRESHOLD_DB = -22.0
+RATIO = 1.8
+KNEE = 2.82843
+ATTACK_MS = 12.0
+RELEASE_MS = 180.0
+LIMIT = 0.95
+LIMITER_ATTACK_MS = 5.0
+LIMITER_RELEASE_MS = 50.0
+# Everything above, for fingerprints of measurements taken through the chain.
+SETTINGS = (
+    VOLUME_DB,
+    HIGHPASS_HZ,
+    LOWPASS_HZ,
+    THRESHOLD_DB,
+    RATIO,
+    KNEE,
+    ATTACK_MS,
+    RELEASE_MS,
+    LIMIT,
+    LIMITER_ATTACK_MS,
+    LIMITER_RELEASE_MS,
+)
+
+# Limiter gains are computed once per block of this many samples and
+# ramped linearly in between, which keeps the per-sample work vectorized.
+_BLOCK = 16
+_SCALE_FRAMES = 1 << 16
+
+
+@lru_cache(maxsize=16)
+def _filter_ir(sample_rate: int):
+    sections = [rbj_biquad("highpass", HIGHPASS_HZ, sample_rate)]
+    # A cutoff at or near Nyquist is not a usable lowpass; skip it as a no-op.
+    if LOWPASS_HZ < 0.45 * sample_rate:
+        sections.append(rbj_biquad("lowpass", LOWPASS_HZ, sample_rate))
+    return impulse_response(sections, sample_rate // 4, gain=10 ** (VOLUME_DB / 20))
+
+
+def _ramp(block_gains, start: float):
+    """Per-sample gains moving linearly from each block's start gain to its end gain."""
+    import numpy as np
+
+    previous = np.concatenate(([start], block_gains[:-1]))
+    fraction = np.arange(1, _BLOCK + 1) / _BLOCK
+    return (previous[:, None] + (block_gains - previous)[:, None] * fraction).ravel()
+
+
+def _compressor_gains(x, sample_rate: int, envelope: float = 0.0):
+    """Downward RMS compressor gains, following ffmpeg's acompressor with linked channels.
+
+    The detector starts from `envelope`; its final value is returned with the gains.
+    """
+    import numpy as np
+
+    detector = (np.abs(x).mean(axis=0) ** 2).tolist()
+    attack = min(1.0, 4000.0 / (ATTACK_MS * sample_rate))
+    release = min(1.0, 4000.0 / (RELEASE_MS * sample_rate))
+    # Whether a sample attacks or releases depends on the envelope before it,
+    # so this is not a linear filter lfilter could run, and averaging the
+    # detector over blocks reads noticeably low. Exact vectorized solutions
+    # (iterating on the attack/release pattern) and a plain for-loop both
+    # measured no faster than this, about 240x realtime at 22.05 kHz.
+    env = np.fromiter(
+        accumulate(
+            detector,
+            lambda slope, level: slope + (level - slope) * (attack if level > slope else release),
+            initial=envelope,
+        ),
+        dtype=np.float64,
+        count=len(detector) + 1,
+    )
+    envelope, env = float(env[-1]), env[1:]
+
+    threshold = 10 ** (THRESHOLD_DB / 20)
+    thres = math.log(threshold)
+    knee_start = math.log(threshold / math.sqrt(KNEE))
+    knee_stop = math.log(threshold * math.sqrt(KNEE))
+    compressed_knee_stop = (knee_stop - thres) / RATIO + thres
+    active = env > (threshold / math.sqrt(KNEE)) ** 2
+    slope_db = 0.5 * np.log(np.where(active, env, 1.0))
+    gain = (slope_db - thres) / RATIO + thres
+    # Hermite interpolation through the knee, as in ffmpeg.
+    width = knee_stop - knee_start
+    t = (slope_db - knee_start) / width
+    m0, m1 = width, width / RATIO
+    p0, p1 = knee_start, compressed_knee_stop
+    knee_gain = (
+        (2 * p0 + m0 - 2 * p1 + m1) * t**3 + (-3 * p0 - 2 * m0 + 3 * p1 - m1) * t**2 + m0 * t + p0
+    )
+    gain = np.where(slope_db < knee_stop, knee_gain, gain)
+    return np.where(active, np.exp(gain - slope_db), 1.0), envelope
+
+
+def _limiter_gains(x, sample_rate: int, gain: float, final: bool):
+    """Lookahead peak limiter gains: never above LIMIT, releasing over LIMITER_RELEASE_MS.
+
+    One gain per whole block of `x`, starting from `gain`. Unless `final`,
+    the last blocks are left out until the samples they look ahead to arrive.
+    """
+    import numpy as np
+
+    lookahead = max(1, math.ceil(LIMITER_ATTACK_MS * sample_rate / 1000 / _BLOCK))
+    blocks = x.shape[1] // _BLOCK
+    ready = blocks if final else blocks - lookahead
+    if ready <= 0:
+        return np.zeros(0)
+    peaks = np.abs(x[:, : blocks * _BLOCK]).max(axis=0).reshape(-1, _BLOCK).max(axis=1)
+    required = np.minimum(1.0, LIMIT / np.maximum(peaks, 1e-12))
+    padded = np.concatenate((required, np.ones(lookahead))) if final else required
+    targets = required[:ready].copy()
+    for shift in range(1, lookahead + 1):
+        np.minimum(targets, padded[shift : shift + ready], out=targets)
+    release = 1 - math.exp(-_BLOCK / (LIMITER_RELEASE_MS * sample_rate / 1000))
+    gains: List[float] = []
+    for target in targets.tolist():
+        gain = min(target, gain + (1 - gain) * release)
+        gains.append(gain)
+    return np.array(gains)
+
+
+class _Chain:
+    """The --natural chain over a signal fed to it in consecutive pieces.
+
+    The filter tail, compressor envelope and limiter gain carry over from one
+    piece to the next, so a chapter fed chunk by chunk comes out as if it had
+    been mastered whole. Output trails input by the limiter's lookahead;
+    `finish` returns the rest.
+    """
+
+    def __init__(self, channels: int, sample_rate: int, gain_db: float = 0.0):
+        import numpy as np
+
+        self.sample_rate = sample_rate
+        self.ir = _filter_ir(sample_rate)
+        self.tail = np.zeros((channels, len(self.ir) - 1))
+        self.envelope = 0.0
+        self.limiter_gain = 1.0
+        self.pending = np.zeros((channels, 0))
+        # alimiter levels its output back up by 1 / limit by default.
+        self.makeup = 10 ** (gain_db / 20) / LIMIT
+
+    def feed(self, samples):
+        import numpy as np
+
+        frames = samples.shape[1]
+        filtered = fft_convolve(samples, self.ir, full=True)
+        filtered[:, : self.tail.shape[1]] += self.tail
+        x, self.tail = filtered[:, :frames], filtered[:, frames:]
+        gains, self.envelope = _compressor_gains(x, self.sample_rate, self.envelope)
+        self.pending = np.concatenate((self.pending, x * gains), axis=1)
+        return self._limit(final=False)
+
+    def finish(self):
+        import numpy as np
+
+        frames = self.pending.shape[1]
+        self.pending = np.pad(self.pending, ((0, 0), (0, -frames % _BLOCK)))
+        return self._limit(final=True)[:, :frames]
+
+    def _limit(self, final: bool):
+        import numpy as np
+
+        gains = _limiter_gains(self.pending, self.sample_rate, self.limiter_gain, final)
+        done = len(gains) * _BLOCK
+        if not done:
+            return self.pending[:, :0]
+        out = self.pending[:, :done] * _ramp(gains, self.limiter_gain)
+        self.limiter_gain = float(gains[-1])
+        self.pending = self.pending[:, done:]
+        return np.clip(out * self.makeup, -1.0, 1.0)
+
+
+def master_samples(samples, sample_rate: int, gain_db: float = 0.0):
+    """Run the --natural chain, then `gain_db`, over a (channels, frames) float array."""
+    import numpy as np
+
+    if not samples.shape[1]:
+        return samples
+    chain = _Chain(samples.shape[0], sample_rate, gain_db)
+    return np.concatenate((chain.feed(samples), chain.finish()), axis=1)
+
+
+def _mastered(
+    wav_paths: Sequence[Path],
+    fmt: WavFormat,
+    gaps_ms: Optional[Sequence[int]],
+    gain_db: float,
+    bounds: Optional[Sequence[Sequence[int]]],
+) -> Iterator:
+    """The inputs, in `fmt`, mastered as one signal; one piece per input, with the gap after it."""
+    import numpy as np
+
+    chain = _Chain(fmt.channels, fmt.sample_rate, gain_db)
+    for idx, path in enumerate(wav_paths):
+        samples, chunk_fmt = read_samples(path)
+        if bounds is not None:
+            start, end = bounds[idx]
+            samples = fade_edges(samples[:, start:end], chunk_fmt.sample_rate)
+        if pcm16_format(chunk_fmt) != fmt:
+            samples = convert_samples(samples, chunk_fmt, fmt)
+        pieces = [chain.feed(samples)]
+        if gaps_ms and idx < len(gaps_ms) and gaps_ms[idx] > 0:
+            # Gaps go through the chain too: the filters ring into them and
+            # the compressor and limiter release over them.
+            pieces.append(chain.feed(np.zeros((fmt.channels, fmt.frames(gaps_ms[idx])))))
+        if idx == len(wav_paths) - 1:
+            pieces.append(chain.finish())
+        yield np.concatenate(pieces, axis=1)
+
+
+def master_chunks(
+    wav_paths: Sequence[Path],
+    gaps_ms: Optional[Sequence[int]] = None,
+    gain_db: float = 0.0,
+    bounds: Optional[Sequence[Sequence[int]]] = None,
+) -> Tuple[WavFormat, Iterator[bytes]]:
+    """16-bit PCM of the mastered inputs with silence between them, one chunk at a time.
+
+    Chain state carries across chunks and gaps, so the result matches
+    mastering the joined chapter at once, while memory stays bounded by the
+    longest chunk. With `bounds`, chunks are cut to those frames and their
+    edges faded, as in `seams.join_trimmed`.
+    """
+    fmt = pcm16_format(read_wav_info(wav_paths[0]).format)
+
+    def blocks() -> Iterator[bytes]:
+        for samples in _mastered(wav_paths, fmt, gaps_ms, gain_db, bounds):
+            yield to_pcm16(samples)
+
+    return fmt, blocks()
+
+
+def mastered_loudness(
+    wav_paths: Sequence[Path],
+    gaps_ms: Optional[Sequence[int]] = None,
+    bounds: Optional[Sequence[Sequence[int]]] = None,
+    output_path: Optional[Path] = None,
+) -> List[Dict]:
+    """Loudness of each input and the gap after it as the chain puts them out, before any gain.
+
+    The compressor and limiter change loudness unevenly, so a `static_gain`
+    taken from these, rather than from the raw chunks, lands on the target.
+    With `output_path`, the chain's output is also kept there as a float
+    WAV, so `scaled_pcm16` can apply the gain without mastering again.
+    """
+    fmt = pcm16_format(read_wav_info(wav_paths[0]).format)
+    float_fmt = WavFormat(fmt.channels, fmt.sample_rate, 4, WAVE_FORMAT_IEEE_FLOAT)
+    out = WavWriter(output_path, float_fmt) if output_path is not None else None
+    measurements: List[Dict] = []
+    try:
+        for samples in _mastered(wav_paths, fmt, gaps_ms, 0.0, bounds):
+            measurements.append(measure_samples(samples, fmt.sample_rate))
+            if out is not None:
+                out.write(to_pcm(samples, float_fmt))
+    except BaseException:
+        if out is not None:
+            out.close()
+            safe_remove(output_path)
+        raise
+    if out is not None:
+        out.close()
+    return measurements
+
+
+def scaled_pcm16(path: Path, gain_db: float) -> Tuple[WavFormat, Iterator[bytes]]:
+    """16-bit PCM of a WAV kept by `mastered_loudness`, with `gain_db` applied, a block at a time."""
+    import numpy as np
+
+    info = read_wav_info(path)
+    scale = 10 ** (gain_db / 20)
+
+    def blocks() -> Iterator[bytes]:
+        for start in range(0, info.frames, _SCALE_FRAMES):
+            samples, _ = read_samples(path, start, _SCALE_FRAMES)
+            yield to_pcm16(np.clip(samples * scale, -1.0, 1.0))
+
+    return pcm16_format(info.format), blocks()
+
+
+def master_to_wav(
+    wav_paths: Sequence[Path],
+    output_path: Path,
+    gaps_ms: Optional[Sequence[int]] = None,
+    gain_db: float = 0.0,
+    bounds: Optional[Sequence[Sequence[int]]] = None,
+) -> None:
+    if not wav_paths:
+        return
+    fmt, blocks = master_chunks(wav_paths, gaps_ms, gain_db, bounds)
+    with WavWriter(output_path, fmt) as out:
+        for block in blocks:
+            out.write(block)
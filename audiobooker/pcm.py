@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Sequence
+
+_BUFFER_SIZE = 1024 * 1024
+_RIFF_LIMIT = 0xFFFFFFFF - 36
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass(frozen=True)
+class WavFormat:
+    channels: int
+    sample_rate: int
+    sample_width: int
+    format_tag: int = WAVE_FORMAT_PCM
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.sample_width
+
+    def frames(self, duration_ms: float) -> int:
+        return int(self.sample_rate * (duration_ms / 1000.0))
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    format: WavFormat
+    data_offset: int
+    data_size: int
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // self.format.block_align
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.format.sample_rate
+
+
+def read_wav_info(path: str | Path) -> WavInfo:
+    """Parse the RIFF header of a WAV file without reading its audio."""
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise RuntimeError(f"Not a RIFF/WAVE file: {path}")
+        fmt: Optional[WavFormat] = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size + size % 2)
+                tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                    raise RuntimeError(f"Unsupported WAV encoding {tag:#x}: {path}")
+                fmt = WavFormat(channels, rate, bits // 8, tag)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise RuntimeError(f"WAV data chunk before its fmt chunk: {path}")
+                offset = f.tell()
+                # Writers that stream to a pipe leave the size unset (0xFFFFFFFF).
+                size = min(size, file_size - offset)
+                return WavInfo(fmt, offset, size - size % fmt.block_align)
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+    raise RuntimeError(f"No audio data in WAV file: {path}")
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, offset: int, size: int) -> None:
+    """Copy `size` bytes from `offset` in `src` to the current position of `dst`."""
+    dst.flush()
+    position = dst.tell()
+    copied = 0
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            while copied < size:
+                n = copy_file_range(src.fileno(), dst.fileno(), size - copied, offset + copied, position + copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError:
+            pass
+    dst.seek(position + copied)
+    if copied < size:
+        src.seek(offset + copied)
+        buffer = bytearray(min(_BUFFER_SIZE, size - copied))
+        view = memoryview(buffer)
+        while copied < size:
+            n = src.readinto(view[: min(len(buffer), size - copied)])
+            if not n:
+                raise RuntimeError(f"WAV file ended early: {getattr(src, 'name', src)}")
+            dst.write(view[:n])
+            copied += n
+
+
+def converted_blocks(path: str | Path, fmt: WavFormat, start: int = 0, end: Optional[int] = None):
+    """Frames of a WAV converted to `fmt`; see `resample.converted_pcm`."""
+    from .dsp import numpy_available
+
+    if not numpy_available():
+        raise RuntimeError("WAV parameters mismatch; install NumPy or ffmpeg for safe merging.")
+    from .resample import converted_pcm
+
+    return converted_pcm(path, fmt, start, end)
+
+
+class WavWriter:
+    """Appends PCM to a WAV file in fixed-size pieces; RIFF sizes are patched on close."""
+
+    def __init__(self, path: str | Path, fmt: WavFormat) -> None:
+        self.path = Path(path)
+        self.format = fmt
+        self.data_size = 0
+        self._file = open(self.path, "wb")
+        self._file.write(self._header())
+
+    def _header(self) -> bytes:
+        fmt = self.format
+        pad = self.data_size % 2
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF",
+            36 + self.data_size + pad,
+            b"WAVE",
+            b"fmt ",
+            16,
+            fmt.format_tag,
+            fmt.channels,
+            fmt.sample_rate,
+            fmt.sample_rate * fmt.block_align,
+            fmt.block_align,
+            fmt.sample_width * 8,
+            b"data",
+            self.data_size,
+        )
+
+    def _reserve(self, size: int) -> None:
+        if self.data_size + size > _RIFF_LIMIT:
+            raise RuntimeError("WAV output would exceed the 4 GiB RIFF limit; use --format mp3 or m4b.")
+        self.data_size += size
+
+    def write(self, data: bytes) -> None:
+        self._reserve(len(data))
+        self._file.write(data)
+
+    def write_silence(self, frames: int) -> None:
+        remaining = frames * self.format.block_align
+        self._reserve(remaining)
+        unsigned = self.format.sample_width == 1 and self.format.format_tag == WAVE_FORMAT_PCM
+        block = memoryview((b"\x80" if unsigned else b"\x00") * min(remaining, _BUFFER_SIZE))
+        while remaining:
+            n = min(remaining, len(block))
+            self._file.write(block[:n])
+            remaining -= n
+
+    def append(
+        self,
+        path: str | Path,
+        info: Optional[WavInfo] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> None:
+        """Copy the audio of another WAV, or only its frames `start` to `end`.
+
+        Audio in another format is converted on the way, which needs NumPy.
+        """
+        info = info or read_wav_info(path)
+        end = info.frames if end is None else min(end, info.frames)
+        if end <= start:
+            return
+        if info.format != self.format:
+            for block in converted_blocks(path, self.format, start, end):
+                self.write(block)
+            return
+        size = (end - start) * self.format.block_align
+        self._reserve(size)
+        with open(path, "rb") as src:
+            _copy_range(src, self._file, info.data_offset + start * self.format.block_align, size)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self.data_size % 2:
+            self._file.write(b"\x00")
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+
+    def __enter__(self) -> WavWriter:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def concat_wavs(
+    wav_paths: Sequence[Path],
+    output_path: Path,
+    gaps_ms: Optional[Sequence[int]] = None,
+) -> None:
+    """Concatenate WAVs, inserting `gaps_ms[i]` of silence after input i.
+
+    Audio is copied between files in fixed-size pieces, so memory use does
+    not grow with the inputs. The output takes the first input's format and
+    other inputs are converted to it.
+    """
+    if not wav_paths:
+        return
+    infos = [read_wav_info(p) for p in wav_paths]
+    fmt = infos[0].format
+    with WavWriter(output_path, fmt) as out:
+        for idx, (wav_path, info) in enumerate(zip(wav_paths, infos)):
+            out.append(wav_path, info)
+            if gaps_ms and idx < len(gaps_ms) and gaps_ms[idx] > 0:
+                out.write_silence(fmt.frames(gaps_ms[idx]))
+
+
+def write_silence_wav(path: Path, duration_ms: int, fmt: WavFormat) -> Path:
+    if not path.exists():
+        # Written aside and renamed, as concurrent chapter encodes share the file.
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        os.close(fd)
+        with WavWriter(tmp, fmt) as out:
+            out.write_silence(fmt.frames(duration_ms))
+        os.replace(tmp, path)
+    return path
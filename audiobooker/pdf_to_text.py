@@ -2,14 +2,58 @@ from __future__ import annotations
 
 import re
 from collections import Counter
-from dataclasses import dataclass
-from typing import Iterable, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
-@dataclass
 class ExtractedText:
-    pages: List[str]
-    full_text: str
+    """The book as one text buffer, with each page kept as a (start, end) span of it.
+
+    `outline` holds the PDF bookmarks as (level, title, 1-based page) rows,
+    when the document has any.
+    """
+
+    __slots__ = ("full_text", "page_spans", "outline")
+
+    def __init__(
+        self,
+        full_text: str,
+        page_spans: List[Tuple[int, int]],
+        outline: Optional[List[Tuple[int, str, int]]] = None,
+    ) -> None:
+        self.full_text = full_text
+        self.page_spans = page_spans
+        self.outline = [tuple(e) for e in outline or []]
+
+    @property
+    def pages(self) -> List[str]:
+        return [self.page(i) for i in range(len(self.page_spans))]
+
+    def page(self, index: int) -> str:
+        start, end = self.page_spans[index]
+        return self.full_text[start:end]
+
+    def to_payload(self) -> Dict:
+        return {"text": self.full_text, "spans": self.page_spans, "outline": self.outline}
+
+    @classmethod
+    def from_payload(cls, payload) -> ExtractedText:
+        """Rebuild from `to_payload()` output or an older pages-only payload."""
+        if isinstance(payload, list):
+            return from_pages(payload)
+        if "pages" in payload:
+            return from_pages(payload["pages"], payload.get("outline"))
+        return cls(payload["text"], [tuple(span) for span in payload["spans"]], payload["outline"])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExtractedText):
+            return NotImplemented
+        return (self.full_text, self.page_spans, self.outline) == (
+            other.full_text,
+            other.page_spans,
+            other.outline,
+        )
 
 
 def _clean_page_text(text: str) -> str:
@@ -33,58 +77,173 @@ def _remove_isolated_page_numbers(lines: Iterable[str]) -> List[str]:
     return cleaned
 
 
-def _remove_headers_footers(pages: List[str]) -> List[str]:
+def _repeated_lines(pages: List[str]) -> Set[str]:
     line_counts = Counter()
-    page_lines = []
     for page in pages:
-        lines = [l for l in page.splitlines() if l.strip()]
-        page_lines.append(lines)
-        line_counts.update(set(lines))
+        line_counts.update({l for l in page.splitlines() if l.strip()})
     threshold = max(2, int(len(pages) * 0.6))
-    repeated = {line for line, count in line_counts.items() if count >= threshold}
-    cleaned_pages = []
-    for lines in page_lines:
-        kept = [l for l in lines if l not in repeated]
-        kept = _remove_isolated_page_numbers(kept)
-        cleaned_pages.append("\n".join(kept).strip())
-    return cleaned_pages
-
-
-def _extract_with_fitz(pdf_path: str) -> List[str]:
-    import fitz  # type: ignore
-
-    doc = fitz.open(pdf_path)
-    pages = []
-    for i in range(len(doc)):
-        page = doc[i]
-        text = page.get_text()
-        text = _clean_page_text(text)
-        pages.append(text)
-    return pages
-
-
-def _extract_with_pdfplumber(pdf_path: str) -> List[str]:
-    import pdfplumber  # type: ignore
-
-    pages = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            text = _clean_page_text(text)
-            pages.append(text)
-    return pages
-
-
-def extract_text(pdf_path: str, keep_headers: bool = False) -> ExtractedText:
-    pages: List[str]
-    try:
-        pages = _extract_with_fitz(pdf_path)
-    except Exception:
-        pages = _extract_with_pdfplumber(pdf_path)
-
-    pages = [_dehyphenate(p) for p in pages]
+    return {line for line, count in line_counts.items() if count >= threshold}
+
+
+def _strip_repeated(page: str, repeated: Set[str]) -> str:
+    kept = [l for l in page.splitlines() if l.strip() and l not in repeated]
+    kept = _remove_isolated_page_numbers(kept)
+    return "\n".join(kept).strip()
+
+
+def _remove_headers_footers(pages: List[str]) -> List[str]:
+    repeated = _repeated_lines(pages)
+    return [_strip_repeated(page, repeated) for page in pages]
+
+
+class _PageReader:
+    """Per-page text access that falls back to pdfplumber one page at a time.
+
+    PyMuPDF is used when it can open the document; a page it fails on (or
+    every page, when it is missing) is read with pdfplumber instead.
+    """
+
+    def __init__(self, pdf_path: str) -> None:
+        self.pdf_path = pdf_path
+        self._fitz_doc = None
+        self._plumber = None
+        try:
+            import fitz  # type: ignore
+
+            self._fitz_doc = fitz.open(pdf_path)
+        except Exception:
+            self._fitz_doc = None
+
+    def _plumber_pdf(self):
+        if self._plumber is None:
+            try:
+                import pdfplumber  # type: ignore
+            except Exception as exc:
+                raise RuntimeError(
+                    "No PDF text extractor available. Install with `pip install pymupdf pdfplumber`."
+                ) from exc
+            self._plumber = pdfplumber.open(self.pdf_path)
+        return self._plumber
+
+    def page_count(self) -> int:
+        if self._fitz_doc is not None:
+            return len(self._fitz_doc)
+        return len(self._plumber_pdf().pages)
+
+    def outline(self) -> List[Tuple[int, str, int]]:
+        if self._fitz_doc is None:
+            return []
+        try:
+            toc = self._fitz_doc.get_toc(simple=True)
+        except Exception:
+            return []
+        return [(int(level), str(title).strip(), int(page)) for level, title, page, *_ in toc]
+
+    def page_text(self, index: int) -> str:
+        if self._fitz_doc is not None:
+            try:
+                return _dehyphenate(_clean_page_text(self._fitz_doc[index].get_text()))
+            except Exception:
+                pass
+        page = self._plumber_pdf().pages[index]
+        text = page.extract_text() or ""
+        page.flush_cache()
+        return _dehyphenate(_clean_page_text(text))
+
+    def close(self) -> None:
+        if self._fitz_doc is not None:
+            self._fitz_doc.close()
+        if self._plumber is not None:
+            self._plumber.close()
+
+    def __enter__(self) -> _PageReader:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    with _PageReader(pdf_path) as reader:
+        return [reader.page_text(i) for i in range(start, end)]
+
+
+def _extract_pages(
+    pdf_path: str,
+    workers: int = 1,
+    min_range: int = 8,
+) -> Tuple[List[str], List[Tuple[int, str, int]]]:
+    """Extract every page and the outline, splitting pages into ranges across processes.
+
+    Each worker opens the PDF itself; ranges come back in page order.
+    """
+    with _PageReader(pdf_path) as reader:
+        count = reader.page_count()
+        outline = reader.outline()
+        if workers <= 1 or count <= min_range:
+            return [reader.page_text(i) for i in range(count)], outline
+    # A few ranges per worker keeps the pool busy when some pages are slower.
+    size = max(min_range, -(-count // (workers * 4)))
+    starts = list(range(0, count, size))
+    ends = [min(count, start + size) for start in starts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ranges = pool.map(_extract_page_range, [pdf_path] * len(starts), starts, ends)
+        return [page for pages in ranges for page in pages], outline
+
+
+def iter_pages(pdf_path: str) -> Iterator[str]:
+    """Yield cleaned, dehyphenated page texts one page at a time."""
+    with _PageReader(pdf_path) as reader:
+        for index in range(reader.page_count()):
+            yield reader.page_text(index)
+
+
+def stream_pages(
+    pdf_path: str,
+    keep_headers: bool = False,
+    header_window: int = 50,
+) -> Iterator[str]:
+    """Streaming counterpart of `extract_text(...).pages`.
+
+    Running headers and footers are learned from the first `header_window`
+    pages instead of the whole document, so only that window is ever held
+    in memory. Books up to that length get exactly the same pages.
+    """
+    pages = iter_pages(pdf_path)
+    if keep_headers:
+        yield from pages
+        return
+    head = list(islice(pages, header_window))
+    repeated = _repeated_lines(head)
+    for page in chain(head, pages):
+        yield _strip_repeated(page, repeated)
+
+
+def extract_text(pdf_path: str, keep_headers: bool = False, workers: int = 1) -> ExtractedText:
+    pages, outline = _extract_pages(pdf_path, workers=workers)
     if not keep_headers:
         pages = _remove_headers_footers(pages)
-    full = "\n\n".join(p for p in pages if p.strip())
-    full = re.sub(r"\n{3,}", "\n\n", full).strip()
-    return ExtractedText(pages=pages, full_text=full)
+    return from_pages(pages, outline)
+
+
+def from_pages(
+    pages: List[str],
+    outline: Optional[List[Tuple[int, str, int]]] = None,
+) -> ExtractedText:
+    """Join pages into one buffer, separated by blank lines, recording each page's span.
+
+    Pages are stored stripped and with runs of blank lines collapsed, which
+    extraction output already is; blank pages become empty spans.
+    """
+    parts: List[str] = []
+    spans: List[Tuple[int, int]] = []
+    cursor = 0
+    for page in pages:
+        page = re.sub(r"\n{3,}", "\n\n", page.strip())
+        if not page:
+            spans.append((cursor, cursor))
+            continue
+        parts.append(page)
+        spans.append((cursor, cursor + len(page)))
+        cursor += len(page) + 2
+    return ExtractedText("\n\n".join(parts), spans, outline)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache import AudioCache, audio_cache_key
+from .chunking import split_sentences
+from .dedup import RenderDeduplicator
+from .pcm import concat_wavs
+from .scheduler import ChunkJob
+
+
+SENTENCE_GAP_MS = 200
+PARAGRAPH_GAP_MS = 450
+
+
+class ChunkRenderer:
+    """Renders chunk jobs with one TTS engine, backed by the synthesis cache.
+
+    In `chunk` mode each chunk is one TTS call. In `sentence` mode every
+    sentence is rendered (and cached) on its own and the chunk WAV is
+    assembled from sentence audio, so moving chunk boundaries only costs a
+    concatenation. Repeated chunks and sentences within a run are rendered
+    once and copied for every further occurrence.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str, Path], None],
+        identity: Tuple[str, str, str],
+        speed: float,
+        cache: Optional[AudioCache] = None,
+        unit: str = "chunk",
+        lang: str = "en",
+        work_dir: Optional[Path] = None,
+    ) -> None:
+        self.synthesize = synthesize
+        self.engine, self.voice_hash, self.speaker_hash = identity
+        self.speed = speed
+        self.cache = cache
+        self.unit = unit
+        self.lang = lang
+        self.chunk_dedup = RenderDeduplicator()
+        # Sentence renders outlive the chunk that first needed them, for the
+        # whole run, so later repeats can copy them.
+        self._sentence_dir: Optional[Path] = None
+        if unit == "sentence":
+            if work_dir is not None:
+                work_dir.mkdir(parents=True, exist_ok=True)
+            self._sentence_dir = Path(tempfile.mkdtemp(prefix=".sentences_", dir=work_dir))
+        self.sentence_dedup = RenderDeduplicator(store_dir=self._sentence_dir)
+
+    def _key(self, text: str, engine: str) -> str:
+        # XTTS speaks the requested language; Piper's language comes with the voice.
+        language = self.lang if self.engine == "xtts" else ""
+        return audio_cache_key(text, engine, self.voice_hash, self.speed, self.speaker_hash, language)
+
+    def chunk_key(self, text: str) -> str:
+        engine = self.engine if self.unit == "chunk" else f"{self.engine}+{self.unit}"
+        return self._key(text, engine)
+
+    def sentence_key(self, text: str) -> str:
+        return self._key(text, self.engine)
+
+    def _render_cached(self, text: str, key: str, output_path: Path) -> None:
+        if self.cache is not None and self.cache.get(key, output_path):
+            return
+        self.synthesize(text, output_path)
+        if self.cache is not None:
+            self.cache.put(key, output_path)
+
+    def _render_sentences(self, text: str, output_path: Path) -> None:
+        sentences = split_sentences(text, self.lang)
+        if not sentences:
+            self.synthesize(text, output_path)
+            return
+        with tempfile.TemporaryDirectory(dir=output_path.parent, prefix=".sentences_") as tmp:
+            paths: List[Path] = []
+            gaps: List[int] = []
+            for idx, (sentence, ends_paragraph) in enumerate(sentences):
+                sentence_path = Path(tmp) / f"{idx:04d}.wav"
+                key = self.sentence_key(sentence)
+                self.sentence_dedup.render(
+                    key,
+                    sentence_path,
+                    lambda path, text=sentence, key=key: self._render_cached(text, key, path),
+                )
+                paths.append(sentence_path)
+                gaps.append(PARAGRAPH_GAP_MS if ends_paragraph else SENTENCE_GAP_MS)
+            assembled = Path(tmp) / "chunk.wav"
+            concat_wavs(paths, assembled, gaps_ms=gaps[:-1])
+            os.replace(assembled, output_path)
+
+    def _produce_chunk(self, job: ChunkJob, output_path: Path) -> None:
+        if self.unit == "sentence":
+            self._render_sentences(job.text, output_path)
+        else:
+            self.synthesize(job.text, output_path)
+        if self.cache is not None:
+            self.cache.put(job.cache_key or self.chunk_key(job.text), output_path)
+
+    def render(self, job: ChunkJob) -> None:
+        key = job.cache_key or self.chunk_key(job.text)
+        self.chunk_dedup.render(key, job.path, lambda path: self._produce_chunk(job, path))
+
+    def close(self) -> None:
+        if self._sentence_dir is not None:
+            shutil.rmtree(self._sentence_dir, ignore_errors=True)
+            self._sentence_dir = None
+
+    def dedup_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {"chunks": self.chunk_dedup.stats()}
+        if self.unit == "sentence":
+            stats["sentences"] = self.sentence_dedup.stats()
+        return stats
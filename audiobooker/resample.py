@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .dsp import read_samples, to_pcm
+from .pcm import WavFormat, read_wav_info
+
+# Windowed-sinc prototype: ZERO_CROSSINGS of the narrower band on each side
+# of the centre, cut off a little below the lower Nyquist frequency.
+ZERO_CROSSINGS = 16
+ROLLOFF = 0.95
+KAISER_BETA = 8.0
+_BLOCK_FRAMES = 1 << 16
+
+
+@lru_cache(maxsize=16)
+def _design(up: int, down: int):
+    """Polyphase filter bank `phases[q, k]` and the prototype's centre, in upsampled samples."""
+    import numpy as np
+
+    factor = max(up, down)
+    center = ZERO_CROSSINGS * factor
+    cutoff = ROLLOFF * 0.5 / factor
+    n = np.arange(2 * center + 1) - center
+    h = 2 * cutoff * up * np.sinc(2 * cutoff * n) * np.kaiser(2 * center + 1, KAISER_BETA)
+    taps = -(-len(h) // up)
+    padded = np.zeros(taps * up)
+    padded[: len(h)] = h
+    return padded.reshape(taps, up).T.copy(), center
+
+
+def _polyphase(x, x_start: int, n0: int, count: int, up: int, down: int):
+    """Outputs `n0 .. n0 + count` of resampling by up/down; `x` holds inputs from index `x_start`.
+
+    Outputs sharing `n % up` use the same filter phase and read the input
+    with a stride of `down`, so each phase is one matrix-vector product.
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    phases, center = _design(up, down)
+    taps = phases.shape[1]
+    # Zero context on both sides keeps every window in range.
+    xp = np.pad(x, ((0, 0), (taps, taps + down)))
+    windows = sliding_window_view(xp, taps, axis=1)
+    out = np.zeros((x.shape[0], count))
+    for r in range(min(up, count)):
+        outputs = (count - r + up - 1) // up
+        q = (r * down + center) % up
+        newest = n0 // up * down + (r * down + center) // up - x_start + taps
+        first = newest - taps + 1
+        out[:, r::up] = windows[:, first : first + down * outputs : down] @ phases[q][::-1]
+    return out
+
+
+def _ratio(src_rate: int, dst_rate: int):
+    g = math.gcd(src_rate, dst_rate)
+    return dst_rate // g, src_rate // g
+
+
+def resample(samples, src_rate: int, dst_rate: int):
+    """Resample a (channels, frames) float array with a polyphase FIR filter."""
+    if src_rate == dst_rate:
+        return samples
+    up, down = _ratio(src_rate, dst_rate)
+    return _polyphase(samples, 0, 0, -(-samples.shape[1] * up // down), up, down)
+
+
+def remix(samples, channels: int):
+    """Down-mix to mono by averaging, or spread mono across `channels`."""
+    import numpy as np
+
+    if samples.shape[0] == channels:
+        return samples
+    mono = samples.mean(axis=0, keepdims=True)
+    return np.repeat(mono, channels, axis=0)
+
+
+def convert_samples(samples, src: WavFormat, dst: WavFormat):
+    return remix(resample(samples, src.sample_rate, dst.sample_rate), dst.channels)
+
+
+def _read_padded(path: Path, start: int, length: int, lo: int, hi: int):
+    """Frames `lo .. hi` of the range `start .. start + length`, zero outside it."""
+    import numpy as np
+
+    first = min(max(lo, 0), length)
+    samples, _ = read_samples(path, start + first, max(0, min(hi, length) - first))
+    before = first - lo
+    return np.pad(samples, ((0, 0), (before, hi - lo - before - samples.shape[1])))
+
+
+def converted_pcm(
+    path: str | Path,
+    fmt: WavFormat,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Frames `start` to `end` of a WAV as PCM in `fmt`, a block at a time."""
+    src = read_wav_info(path)
+    end = src.frames if end is None else min(end, src.frames)
+    length = max(0, end - start)
+    up, down = _ratio(src.format.sample_rate, fmt.sample_rate)
+    if up != down:
+        phases, center = _design(up, down)
+        taps = phases.shape[1]
+    total = -(-length * up // down)
+    per_block = up * max(1, _BLOCK_FRAMES // down)
+    for n0 in range(0, total, per_block):
+        count = min(per_block, total - n0)
+        if up == down:
+            block = _read_padded(path, start, length, n0, n0 + count)
+        else:
+            lo = (n0 * down + center) // up - taps + 1
+            hi = ((n0 + count - 1) * down + center) // up + 1
+            block = _polyphase(_read_padded(path, start, length, lo, hi), lo, n0, count, up, down)
+        yield to_pcm(remix(block, fmt.channels), fmt)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class ChunkJob:
+    chapter_index: int
+    chunk_index: int
+    text: str
+    path: Path
+    cache_key: Optional[str] = None
+    fingerprint: str = ""
+    loudness: Optional[Dict] = None
+    trim: Optional[List[int]] = None
+
+
+def run_chunk_jobs(
+    chapters: Iterable[Tuple[int, Sequence[ChunkJob]]],
+    synthesize: Callable[[ChunkJob], None],
+    workers: int = 1,
+    on_chunk_done: Callable[[ChunkJob], None] = lambda job: None,
+    on_chapter_done: Callable[[int], None] = lambda chapter_index: None,
+    max_pending: Optional[int] = None,
+) -> None:
+    """Synthesize pending chunks from every chapter on a pool of worker threads.
+
+    Jobs are submitted chapter by chapter so early chapters finish first.
+    `chapters` may be a lazy iterable: each chapter is pulled only after the
+    previous one is submitted, so synthesis of early chapters overlaps with
+    whatever produces the later ones. With `max_pending` set, pulling the
+    next chapter waits until fewer jobs than that are in flight.
+
+    The callbacks always run on the calling thread, which makes them the
+    single place where shared state such as the manifest is mutated. A
+    chapter is reported done as soon as its last chunk completes; chapters
+    without pending jobs are reported right after submission. The first
+    failure cancels the remaining jobs and is re-raised.
+    """
+    remaining: Dict[int, int] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending: Dict[Future, ChunkJob] = {}
+
+        def collect(timeout: Optional[float]) -> None:
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: (pending[f].chapter_index, pending[f].chunk_index)):
+                job = pending.pop(future)
+                future.result()
+                on_chunk_done(job)
+                remaining[job.chapter_index] -= 1
+                if remaining[job.chapter_index] == 0:
+                    on_chapter_done(job.chapter_index)
+
+        try:
+            for chapter_index, jobs in chapters:
+                remaining[chapter_index] = len(jobs)
+                for job in jobs:
+                    pending[pool.submit(synthesize, job)] = job
+                if not jobs:
+                    on_chapter_done(chapter_index)
+                if pending:
+                    collect(0)
+                while max_pending is not None and len(pending) >= max_pending:
+                    collect(None)
+            while pending:
+                collect(None)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+
+class BackgroundPool:
+    """A bounded thread pool for work that overlaps synthesis, such as chapter encodes.
+
+    Results are handed back on the calling thread, keyed as submitted:
+    `finished()` returns whatever has completed so far and `drain()` waits
+    for the rest. A failed job re-raises there and cancels the jobs that
+    have not started.
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._pending: Dict[Future, Hashable] = {}
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> None:
+        self._pending[self._pool.submit(fn, *args)] = key
+
+    def _collect(self, futures: Iterable[Future]) -> List[Tuple[Hashable, Any]]:
+        results = []
+        for future in futures:
+            key = self._pending.pop(future)
+            try:
+                results.append((key, future.result()))
+            except BaseException:
+                self.cancel()
+                raise
+        return results
+
+    def finished(self) -> List[Tuple[Hashable, Any]]:
+        return self._collect([f for f in self._pending if f.done()])
+
+    def drain(self) -> List[Tuple[Hashable, Any]]:
+        return self._collect(list(self._pending))
+
+    def cancel(self) -> None:
+        for future in self._pending:
+            future.cancel()
+
+    def __enter__(self) -> BackgroundPool:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cancel()
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .dsp import read_samples, to_pcm
+from .pcm import WavWriter, read_wav_info
+from .resample import convert_samples
+
+# A chunk's speech runs from the first to the last 10 ms window whose RMS
+# reaches THRESHOLD_DB, widened by MARGIN_MS so soft onsets and decays
+# survive. Trimmed edges are faded over FADE_MS into the gap that follows.
+THRESHOLD_DB = -50.0
+MARGIN_MS = 40
+FADE_MS = 10
+_WINDOW_MS = 10
+
+
+def speech_bounds(path: str | Path, threshold_db: float = THRESHOLD_DB, margin_ms: int = MARGIN_MS) -> List[int]:
+    """[start, end) frames of a WAV without its leading and trailing silence."""
+    import numpy as np
+
+    samples, fmt = read_samples(path)
+    frames = samples.shape[1]
+    window = max(1, fmt.frames(_WINDOW_MS))
+    padded = np.pad(samples, ((0, 0), (0, -frames % window)))
+    rms = np.sqrt((padded**2).mean(axis=0).reshape(-1, window).mean(axis=1))
+    loud = np.flatnonzero(rms >= 10 ** (threshold_db / 20))
+    if not loud.size:
+        return [0, 0]
+    margin = fmt.frames(margin_ms)
+    return [max(0, int(loud[0]) * window - margin), min(frames, (int(loud[-1]) + 1) * window + margin)]
+
+
+def _fade_frames(frames: int, fade_ms: int, sample_rate: int) -> int:
+    return min(int(sample_rate * fade_ms / 1000), frames // 2)
+
+
+def _ramp(frames: int):
+    """Raised-cosine fade-in curve."""
+    import numpy as np
+
+    return 0.5 - 0.5 * np.cos(np.pi * (np.arange(frames) + 0.5) / frames)
+
+
+def fade_edges(samples, sample_rate: int, fade_ms: int = FADE_MS):
+    """Fade a (channels, frames) array in and out over `fade_ms` at each end."""
+    fade = _fade_frames(samples.shape[1], fade_ms, sample_rate)
+    if fade:
+        samples = samples.copy()
+        samples[:, :fade] *= _ramp(fade)
+        samples[:, -fade:] *= _ramp(fade)[::-1]
+    return samples
+
+
+def join_trimmed(
+    wav_paths: Sequence[Path],
+    output_path: Path,
+    bounds: Sequence[Sequence[int]],
+    gaps_ms: Optional[Sequence[int]] = None,
+    fade_ms: int = FADE_MS,
+) -> None:
+    """Concatenate the `bounds` of each WAV with exact gaps, fading every trimmed edge.
+
+    Only the faded edges are decoded; the audio between them is copied as is.
+    Chunks in another format than the first are converted to it.
+    """
+    if not wav_paths:
+        return
+    infos = [read_wav_info(p) for p in wav_paths]
+    fmt = infos[0].format
+    with WavWriter(output_path, fmt) as out:
+        for idx, (wav_path, info, (start, end)) in enumerate(zip(wav_paths, infos, bounds)):
+            end = min(end, info.frames)
+            fade = _fade_frames(max(0, end - start), fade_ms, info.format.sample_rate)
+            if info.format != fmt and end > start:
+                # Chunks are short; convert the whole trimmed range at once.
+                samples, _ = read_samples(wav_path, start, end - start)
+                samples = fade_edges(samples, info.format.sample_rate, fade_ms)
+                out.write(to_pcm(convert_samples(samples, info.format, fmt), fmt))
+            elif fade:
+                head, _ = read_samples(wav_path, start, fade)
+                out.write(to_pcm(head * _ramp(fade), fmt))
+                out.append(wav_path, info, start + fade, end - fade)
+                tail, _ = read_samples(wav_path, end - fade, fade)
+                out.write(to_pcm(tail * _ramp(fade)[::-1], fmt))
+            else:
+                out.append(wav_path, info, start, end)
+            if gaps_ms and idx < len(gaps_ms) and gaps_ms[idx] > 0:
+                out.write_silence(fmt.frames(gaps_ms[idx]))
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import json
 import os
+import queue
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
+import wave
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
+from .dsp import numpy_available
 from .utils import clean_tts_text, ensure_dir
 
 
@@ -32,6 +40,17 @@ def resolve_model(voice: str, model_dir: Optional[str] = None) -> Path:
     )
 
 
+def _piper_env() -> dict:
+    env = os.environ.copy()
+    env.setdefault("PYTHONIOENCODING", "utf-8:ignore")
+    env.setdefault("PYTHONUTF8", "1")
+    return env
+
+
+def _length_scale(speed: float) -> float:
+    return max(0.5, min(2.0, 1.0 / speed))
+
+
 def synthesize(
     text: str,
     output_path: str | Path,
@@ -43,7 +62,7 @@ def synthesize(
     model_path = resolve_model(voice, model_dir=model_dir)
     output_path = Path(output_path)
     ensure_dir(output_path.parent)
-    length_scale = max(0.5, min(2.0, 1.0 / speed))
+    length_scale = _length_scale(speed)
 
     cmd = [
         "piper",
@@ -54,9 +73,6 @@ def synthesize(
         "--length_scale",
         str(length_scale),
     ]
-    env = os.environ.copy()
-    env.setdefault("PYTHONIOENCODING", "utf-8:ignore")
-    env.setdefault("PYTHONUTF8", "1")
     try:
         subprocess.run(
             cmd,
@@ -64,7 +80,7 @@ def synthesize(
             text=True,
             encoding="utf-8",
             check=True,
-            env=env,
+            env=_piper_env(),
         )
     except FileNotFoundError as exc:
         raise RuntimeError(
@@ -73,3 +89,333 @@ def synthesize(
         ) from exc
     except subprocess.CalledProcessError as exc:
         raise RuntimeError(f"Piper failed with exit code {exc.returncode}") from exc
+
+
+def _reported_wav(message: str, work_dir: Path) -> Optional[Path]:
+    """The WAV under `work_dir` that a Piper output line reports, if any.
+
+    Matching from the known directory rather than on whitespace-free tokens
+    keeps paths with spaces (such as Windows profile directories) intact.
+    """
+    for prefix in dict.fromkeys((str(work_dir), str(work_dir.resolve()))):
+        start = message.find(prefix)
+        if start < 0:
+            continue
+        end = message.find(".wav", start + len(prefix))
+        if end >= 0:
+            return Path(message[start : end + 4])
+    return None
+
+
+class PiperWorkerError(RuntimeError):
+    pass
+
+
+class PiperWorker:
+    """One long-lived `piper` process that keeps its voice model loaded.
+
+    Piper is started in directory mode and fed one line of text per chunk on
+    stdin. Each line is rendered into the worker's private directory and the
+    written path is reported on stdout (or logged on stderr by the Python
+    build), which is used as the completion signal.
+    """
+
+    def __init__(self, model_path: Path, length_scale: float, timeout: float = 600.0) -> None:
+        self.model_path = model_path
+        self.length_scale = length_scale
+        self.timeout = timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._work_dir: Optional[Path] = None
+
+    def start(self) -> None:
+        self.stop()
+        self._work_dir = Path(tempfile.mkdtemp(prefix="piper_worker_"))
+        self._lines = queue.Queue()
+        cmd = [
+            "piper",
+            "--model",
+            str(self.model_path),
+            "--output_dir",
+            str(self._work_dir),
+            "--length_scale",
+            str(self.length_scale),
+        ]
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="ignore",
+                bufsize=1,
+                env=_piper_env(),
+            )
+        except FileNotFoundError as exc:
+            raise RuntimeError(
+                "Piper executable not found. Install via `pip install piper-tts` "
+                "or download the Piper binary and add it to PATH."
+            ) from exc
+        for stream in (self._proc.stdout, self._proc.stderr):
+            threading.Thread(target=self._pump, args=(stream, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _pump(stream, lines: "queue.Queue[Optional[str]]") -> None:
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def synthesize(self, text: str, output_path: Path) -> None:
+        if not self.is_alive():
+            self.start()
+        assert self._proc is not None and self._proc.stdin is not None
+        line = " ".join(clean_tts_text(text).split())
+        try:
+            self._proc.stdin.write(line + "\n")
+            self._proc.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            raise PiperWorkerError("Piper worker stdin closed") from exc
+
+        deadline = time.monotonic() + self.timeout
+        closed_streams = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PiperWorkerError(f"Piper worker timed out after {self.timeout:.0f}s")
+            try:
+                message = self._lines.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                if not self.is_alive():
+                    raise PiperWorkerError("Piper worker exited unexpectedly")
+                continue
+            if message is None:
+                closed_streams += 1
+                if closed_streams >= 2:
+                    raise PiperWorkerError("Piper worker exited unexpectedly")
+                continue
+            produced = _reported_wav(message, self._work_dir)
+            if produced is not None and produced.exists():
+                ensure_dir(output_path.parent)
+                shutil.move(str(produced), str(output_path))
+                return
+
+    def stop(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            try:
+                if proc.stdin:
+                    proc.stdin.close()
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                proc.kill()
+                proc.wait()
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+
+class PiperPool:
+    """Pool of persistent Piper workers with restart-on-crash.
+
+    Workers are started lazily and handed out one request at a time, so the
+    pool can be shared by several synthesis threads. A worker that dies or
+    stops responding is restarted and the chunk retried; if workers cannot be
+    kept alive the pool falls back to one `piper` process per chunk.
+    """
+
+    def __init__(
+        self,
+        voice: str = DEFAULT_PIPER_VOICE,
+        speed: float = 1.0,
+        workers: int = 1,
+        model_dir: Optional[str] = None,
+        max_restarts: int = 2,
+        timeout: float = 600.0,
+    ) -> None:
+        self.voice = voice
+        self.speed = speed
+        self.model_dir = model_dir
+        self.model_path = resolve_model(voice, model_dir=model_dir)
+        self.max_restarts = max_restarts
+        self._workers: List[PiperWorker] = [
+            PiperWorker(self.model_path, _length_scale(speed), timeout=timeout)
+            for _ in range(max(1, workers))
+        ]
+        self._idle: "queue.Queue[PiperWorker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._degraded = False
+
+    def synthesize(self, text: str, output_path: str | Path) -> None:
+        output_path = Path(output_path)
+        if self._degraded:
+            synthesize(text, output_path, voice=str(self.model_path), speed=self.speed)
+            return
+        worker = self._idle.get()
+        try:
+            for attempt in range(self.max_restarts + 1):
+                try:
+                    worker.synthesize(text, output_path)
+                    return
+                except PiperWorkerError as exc:
+                    print(f"[WARN] {exc}; restarting Piper worker ({attempt + 1}/{self.max_restarts + 1}).")
+                    worker.stop()
+            print("[WARN] Piper workers keep failing; falling back to one process per chunk.")
+            self._degraded = True
+        finally:
+            self._idle.put(worker)
+        synthesize(text, output_path, voice=str(self.model_path), speed=self.speed)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+
+    def __enter__(self) -> "PiperPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_PAD = "_"
+_BOS = "^"
+_EOS = "$"
+
+
+def default_thread_budget(workers: int) -> int:
+    """Intra-op threads per worker so that workers x threads fits the machine."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+class PiperOnnxEngine:
+    """In-process Piper voice backed by one onnxruntime session per worker.
+
+    The model is resolved once and each of the `workers` sessions is reused
+    for every chunk it is handed, as `PiperPool` does with processes. Every
+    session runs one inference at a time with `intra_op_threads` threads
+    (by default the cores divided among the workers), so concurrent chunks
+    do not oversubscribe the machine.
+    """
+
+    def __init__(
+        self,
+        voice: str = DEFAULT_PIPER_VOICE,
+        speed: float = 1.0,
+        model_dir: Optional[str] = None,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: int = 1,
+        sentence_silence: float = 0.2,
+        workers: int = 1,
+    ) -> None:
+        if not numpy_available():
+            raise RuntimeError("In-process Piper requires NumPy. Install with `pip install numpy`.")
+        try:
+            import onnxruntime  # type: ignore
+            from piper_phonemize import phonemize_codepoints, phonemize_espeak  # type: ignore
+        except Exception as exc:
+            raise RuntimeError(
+                "In-process Piper requires `onnxruntime` and `piper-phonemize`. "
+                "Install with `pip install onnxruntime piper-phonemize`."
+            ) from exc
+
+        self.model_path = resolve_model(voice, model_dir=model_dir)
+        config_path = Path(f"{self.model_path}.json")
+        if not config_path.exists():
+            raise FileNotFoundError(f"Piper voice config not found: {config_path}")
+        self.config: Dict[str, Any] = json.loads(config_path.read_text(encoding="utf-8"))
+        self.sample_rate = int(self.config["audio"]["sample_rate"])
+        inference = self.config.get("inference", {})
+        self.noise_scale = float(inference.get("noise_scale", 0.667))
+        self.noise_w = float(inference.get("noise_w", 0.8))
+        self.length_scale = float(inference.get("length_scale", 1.0)) * _length_scale(speed)
+        self.sentence_silence = sentence_silence
+        self._phoneme_id_map: Dict[str, List[int]] = self.config["phoneme_id_map"]
+        if self.config.get("phoneme_type", "espeak") == "text":
+            self._phonemize = phonemize_codepoints
+        else:
+            espeak_voice = self.config.get("espeak", {}).get("voice", "en-us")
+            self._phonemize = lambda text: phonemize_espeak(text, espeak_voice)
+
+        workers = max(1, workers)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or default_thread_budget(workers)
+        options.inter_op_num_threads = max(1, inter_op_threads)
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        # Idle spinning threads from several sessions/workers fight over cores.
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+        self._sessions = [
+            onnxruntime.InferenceSession(
+                str(self.model_path),
+                sess_options=options,
+                providers=["CPUExecutionProvider"],
+            )
+            for _ in range(workers)
+        ]
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        for session in self._sessions:
+            self._idle.put(session)
+        self._input_names = {i.name for i in self._sessions[0].get_inputs()}
+
+    def _phoneme_ids(self, phonemes: List[str]) -> List[int]:
+        id_map = self._phoneme_id_map
+        ids = list(id_map[_BOS])
+        for phoneme in phonemes:
+            if phoneme not in id_map:
+                continue
+            ids.extend(id_map[phoneme])
+            ids.extend(id_map[_PAD])
+        ids.extend(id_map[_EOS])
+        return ids
+
+    def _infer(self, session, phoneme_ids: List[int]):
+        import numpy as np  # type: ignore
+
+        feeds = {
+            "input": np.array([phoneme_ids], dtype=np.int64),
+            "input_lengths": np.array([len(phoneme_ids)], dtype=np.int64),
+            "scales": np.array(
+                [self.noise_scale, self.length_scale, self.noise_w], dtype=np.float32
+            ),
+        }
+        if "sid" in self._input_names:
+            feeds["sid"] = np.array([0], dtype=np.int64)
+        audio = session.run(None, feeds)[0].squeeze()
+        peak = max(0.01, float(np.max(np.abs(audio)))) if audio.size else 1.0
+        return np.clip(audio * (32767.0 / peak), -32768, 32767).astype(np.int16)
+
+    def synthesize(self, text: str, output_path: str | Path) -> None:
+        import numpy as np  # type: ignore
+
+        output_path = Path(output_path)
+        ensure_dir(output_path.parent)
+        silence = np.zeros(int(self.sample_rate * self.sentence_silence), dtype=np.int16)
+        pieces = []
+        session = self._idle.get()
+        try:
+            for sentence in self._phonemize(clean_tts_text(text)):
+                if not sentence:
+                    continue
+                pieces.append(self._infer(session, self._phoneme_ids(sentence)))
+                pieces.append(silence)
+        finally:
+            self._idle.put(session)
+        audio = np.concatenate(pieces[:-1]) if pieces else np.zeros(0, dtype=np.int16)
+        with wave.open(str(output_path), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(audio.tobytes())
+
+    def close(self) -> None:
+        self._sessions = []
+
+    def __enter__(self) -> "PiperOnnxEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
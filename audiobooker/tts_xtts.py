@@ -1,9 +1,214 @@
 from __future__ import annotations
 
+import gc
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
-from .utils import clean_tts_text
+from .utils import clean_tts_text, ensure_dir, sha256_file
+
+
+XTTS_MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+
+
+class XTTSEngine:
+    """Process-wide XTTS model, loaded once and reused for every chunk.
+
+    Inference on one model instance is serialized with a lock; the weights are
+    only loaded on the first `load()`/`warmup()`/`synthesize()` call and can be
+    released again with `close()`.
+    """
+
+    def __init__(self, model_name: str = XTTS_MODEL_NAME) -> None:
+        self.model_name = model_name
+        self._tts = None
+        self._lock = threading.RLock()
+        self._latents: Dict[Tuple[str, str], Any] = {}
+        self._speaker_hashes: Dict[str, str] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._tts is not None
+
+    def load(self):
+        with self._lock:
+            if self._tts is None:
+                try:
+                    from TTS.api import TTS  # type: ignore
+                except Exception as exc:
+                    raise RuntimeError(
+                        "Coqui TTS not installed. Install with `pip install TTS`."
+                    ) from exc
+                self._tts = TTS(model_name=self.model_name)
+            return self._tts
+
+    def model_version(self) -> str:
+        try:
+            import TTS  # type: ignore
+
+            version = getattr(TTS, "__version__", "unknown")
+        except Exception:
+            version = "unknown"
+        return f"{self.model_name.replace('/', '_')}-{version}"
+
+    def _xtts_model(self):
+        tts = self.load()
+        model = getattr(getattr(tts, "synthesizer", None), "tts_model", None)
+        if model is None or not hasattr(model, "get_conditioning_latents"):
+            return None
+        return model
+
+    def conditioning_latents(self, speaker_wav: str, cache_dir: Optional[str | Path] = None):
+        """Return (gpt_cond_latent, speaker_embedding) for a reference WAV.
+
+        Latents are keyed by the WAV's sha256 and the model version, kept in
+        memory for the run and, when `cache_dir` is given, stored on disk so
+        later runs with the same voice skip the computation entirely.
+        """
+        model = self._xtts_model()
+        if model is None:
+            return None
+        with self._lock:
+            speaker_hash = self._speaker_hashes.get(speaker_wav)
+            if speaker_hash is None:
+                speaker_hash = sha256_file(speaker_wav)
+                self._speaker_hashes[speaker_wav] = speaker_hash
+            key = (speaker_hash, self.model_version())
+            if key in self._latents:
+                return self._latents[key]
+            import torch  # type: ignore
+
+            cache_path: Optional[Path] = None
+            if cache_dir is not None:
+                cache_path = Path(cache_dir) / "xtts_latents" / f"{key[0]}_{key[1]}.pt"
+                if cache_path.exists():
+                    try:
+                        payload = torch.load(str(cache_path), map_location=model.device)
+                        latents = (payload["gpt_cond_latent"], payload["speaker_embedding"])
+                        self._latents[key] = latents
+                        return latents
+                    except Exception:
+                        print(f"[WARN] Ignoring unreadable speaker cache: {cache_path}")
+
+            config = model.config
+            latents = model.get_conditioning_latents(
+                audio_path=[speaker_wav],
+                gpt_cond_len=getattr(config, "gpt_cond_len", 6),
+                gpt_cond_chunk_len=getattr(config, "gpt_cond_chunk_len", 6),
+                max_ref_length=getattr(config, "max_ref_len", 30),
+                sound_norm_refs=getattr(config, "sound_norm_refs", False),
+            )
+            self._latents[key] = latents
+            if cache_path is not None:
+                ensure_dir(cache_path.parent)
+                tmp_path = cache_path.with_suffix(".tmp")
+                torch.save(
+                    {"gpt_cond_latent": latents[0], "speaker_embedding": latents[1]},
+                    str(tmp_path),
+                )
+                tmp_path.replace(cache_path)
+            return latents
+
+    def warmup(
+        self,
+        language: str = "en",
+        speaker_wav: Optional[str] = None,
+        cache_dir: Optional[str | Path] = None,
+    ) -> None:
+        """Load the model and run one short inference so the first chunk is not slow."""
+        tts = self.load()
+        with self._lock:
+            if speaker_wav is None and not getattr(tts, "speakers", None):
+                return
+            if speaker_wav is not None and self._xtts_model() is not None:
+                latents = self.conditioning_latents(speaker_wav, cache_dir=cache_dir)
+                self._xtts_model().inference(
+                    "Warm up.", language, latents[0], latents[1], enable_text_splitting=True
+                )
+                return
+            kwargs = {"speaker_wav": speaker_wav} if speaker_wav else {"speaker": tts.speakers[0]}
+            tts.tts(text="Warm up.", language=language, **kwargs)
+
+    def synthesize(
+        self,
+        text: str,
+        output_path: str | Path,
+        language: str = "en",
+        speaker_wav: Optional[str] = None,
+        speed: float = 1.0,
+        cache_dir: Optional[str | Path] = None,
+    ) -> None:
+        text = clean_tts_text(text)
+        output_path = Path(output_path)
+        tts = self.load()
+        with self._lock:
+            if speaker_wav is None:
+                if getattr(tts, "speakers", None):
+                    speaker = tts.speakers[0]
+                    tts.tts_to_file(text=text, file_path=str(output_path), speaker=speaker, speed=speed)
+                    return
+                raise RuntimeError("XTTS requires --speaker WAV for voice cloning.")
+
+            ensure_dir(output_path.parent)
+            model = self._xtts_model()
+            if model is not None:
+                gpt_cond_latent, speaker_embedding = self.conditioning_latents(
+                    speaker_wav, cache_dir=cache_dir
+                )
+                out = model.inference(
+                    text,
+                    language,
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    speed=speed,
+                    enable_text_splitting=True,
+                )
+                tts.synthesizer.save_wav(wav=out["wav"], path=str(output_path))
+                return
+            tts.tts_to_file(
+                text=text,
+                file_path=str(output_path),
+                speaker_wav=speaker_wav,
+                language=language,
+                speed=speed,
+            )
+
+    def close(self) -> None:
+        """Drop the model weights and return GPU memory to the allocator."""
+        with self._lock:
+            if self._tts is None:
+                return
+            self._tts = None
+            self._latents.clear()
+        gc.collect()
+        try:
+            import torch  # type: ignore
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+_ENGINES: Dict[str, XTTSEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(model_name: str = XTTS_MODEL_NAME) -> XTTSEngine:
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(model_name)
+        if engine is None:
+            engine = XTTSEngine(model_name)
+            _ENGINES[model_name] = engine
+        return engine
+
+
+def release_engines() -> None:
+    with _ENGINES_LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+    for engine in engines:
+        engine.close()
 
 
 def synthesize(
@@ -12,29 +217,13 @@ def synthesize(
     language: str = "en",
     speaker_wav: Optional[str] = None,
     speed: float = 1.0,
+    cache_dir: Optional[str | Path] = None,
 ) -> None:
-    text = clean_tts_text(text)
-    try:
-        from TTS.api import TTS  # type: ignore
-    except Exception as exc:
-        raise RuntimeError(
-            "Coqui TTS not installed. Install with `pip install TTS`."
-        ) from exc
-
-    tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2")
-    if speaker_wav is None:
-        if getattr(tts, "speakers", None):
-            speaker = tts.speakers[0]
-            tts.tts_to_file(text=text, file_path=str(output_path), speaker=speaker, speed=speed)
-            return
-        raise RuntimeError("XTTS requires --speaker WAV for voice cloning.")
-
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    tts.tts_to_file(
-        text=text,
-        file_path=str(output_path),
-        speaker_wav=speaker_wav,
+    get_engine().synthesize(
+        text,
+        output_path,
         language=language,
+        speaker_wav=speaker_wav,
         speed=speed,
+        cache_dir=cache_dir,
     )
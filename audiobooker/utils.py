@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import os
 import re
 import shutil
@@ -24,6 +25,21 @@ def sha256_file(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
     return h.hexdigest()
 
 
+def fingerprint(*parts: object) -> str:
+    """Stable hash of JSON-serializable inputs, used to key build stages."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def default_cache_dir() -> Path:
+    env_dir = os.environ.get("AUDIOBOOKER_CACHE_DIR")
+    if env_dir:
+        return Path(env_dir)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "audiobooker"
+
+
 def ffmpeg_exists() -> bool:
     return shutil.which("ffmpeg") is not None
 
@@ -0,0 +1,23 @@
+import wave
+from pathlib import Path
+
+from audiobooker.pcm import WavFormat
+
+
+def write_wav(path: Path, samples, rate: int = 22050, width: int = 2) -> Path:
+    """Write raw PCM bytes, or a float array of (frames,) or (channels, frames), as a WAV file."""
+    if isinstance(samples, bytes):
+        channels, frames = 1, samples
+    else:
+        from audiobooker.dsp import to_pcm
+
+        if samples.ndim == 1:
+            samples = samples[None]
+        channels = samples.shape[0]
+        frames = to_pcm(samples, WavFormat(channels, rate, width))
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(width)
+        wf.setframerate(rate)
+        wf.writeframes(frames)
+    return path
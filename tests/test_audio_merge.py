@@ -0,0 +1,61 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from _audio import write_wav
+
+from audiobooker import audio_merge
+from audiobooker.audio_merge import assemble_copy, concat_audio, probe_duration
+from audiobooker.utils import ffmpeg_exists
+
+
+def _tone(path: Path, seconds: float, rate: int = 22050) -> Path:
+    return write_wav(path, b"\x10\x00\xf0\xff" * int(rate * seconds / 2), rate)
+
+
+def test_concat_audio_runs_ffmpeg_once_over_the_concat_demuxer(tmp_path: Path, monkeypatch):
+    wavs = [_tone(tmp_path / f"{idx}.wav", 0.5) for idx in range(3)]
+    out_dir = tmp_path / "out"
+    calls = []
+
+    def fake_run(args, check=False, **kwargs):
+        list_path = Path(args[args.index("-i") + 1])
+        calls.append((args, list_path.read_text(encoding="utf-8")))
+        Path(args[-1]).write_bytes(b"")
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(audio_merge, "ffmpeg_exists", lambda: True)
+    monkeypatch.setattr(audio_merge.subprocess, "run", fake_run)
+
+    concat_audio(wavs, out_dir / "chapter.mp3", fmt="mp3", natural=True)
+
+    assert len(calls) == 1
+    args, listing = calls[0]
+    assert args[args.index("-f") + 1] == "concat"
+    assert listing.splitlines() == [f"file '{w.resolve().as_posix()}'" for w in wavs]
+    assert args[args.index("-af") + 1] == (
+        "volume=-2dB,highpass=f=55,lowpass=f=9800,"
+        "acompressor=threshold=-22dB:ratio=1.8:attack=12:release=180,alimiter=limit=0.95"
+    )
+    assert sorted(p.name for p in out_dir.iterdir()) == ["chapter.mp3"]
+
+
+@pytest.mark.skipif(not ffmpeg_exists(), reason="ffmpeg not installed")
+def test_assemble_copy_joins_encoded_chapters_with_markers(tmp_path: Path):
+    chapters = []
+    for idx, seconds in enumerate([1.0, 2.0], start=1):
+        wav = _tone(tmp_path / f"{idx}.wav", seconds)
+        chapters.append(concat_audio([wav], tmp_path / f"{idx:02d}.mp3", fmt="mp3"))
+
+    book = assemble_copy(chapters, tmp_path / "book.mp3", metadata_title="Book", chapter_titles=["One", "Two"])
+
+    assert probe_duration(book) == pytest.approx(3.0, abs=0.15)
+    metadata = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(book), "-f", "ffmetadata", "-"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert "title=One" in metadata and "title=Two" in metadata
+    assert not list(tmp_path.glob(".merge_*"))
@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+
+from audiobooker import cache as cache_module
+from audiobooker.cache import AudioCache, ExtractionCache, audio_cache_key, cached_sha256
+from audiobooker.pdf_to_text import from_pages
+
+
+def test_cache_key_ignores_whitespace_but_not_voice():
+    base = audio_cache_key("Hello  there.\n\nBye.", "piper", "abc", 1.0)
+    assert base == audio_cache_key("Hello there. Bye.", "piper", "abc", 1.0)
+    assert base != audio_cache_key("Hello there. Bye.", "piper", "def", 1.0)
+    assert base != audio_cache_key("Hello there. Bye.", "piper", "abc", 1.1)
+    german = audio_cache_key("Hallo.", "xtts", "m", 1.0, language="de")
+    assert german != audio_cache_key("Hallo.", "xtts", "m", 1.0, language="en")
+
+
+def test_cache_roundtrip_and_lru_eviction(tmp_path: Path):
+    cache = AudioCache(tmp_path / "cache", max_bytes=250)
+    for idx, key in enumerate(["aa01", "bb02", "cc03"]):
+        src = tmp_path / f"{key}.wav"
+        src.write_bytes(bytes(100))
+        cache.put(key, src)
+        os.utime(cache._entry_path(key), (idx, idx))
+        if key == "bb02":
+            assert cache.get("aa01", tmp_path / "hit.wav")
+            os.utime(cache._entry_path("aa01"), (10, 10))
+
+    assert cache.contains("aa01")
+    assert not cache.contains("bb02")
+    assert cache.contains("cc03")
+    assert cache.size_bytes <= 250
+    assert not cache.get("bb02", tmp_path / "miss.wav")
+
+
+def test_file_hash_is_reused_until_the_file_changes(tmp_path: Path, monkeypatch):
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"v1")
+    calls = []
+    real_sha256 = cache_module.sha256_file
+    monkeypatch.setattr(cache_module, "sha256_file", lambda p: calls.append(p) or real_sha256(p))
+
+    first = cached_sha256(pdf, tmp_path / "cache")
+    assert cached_sha256(pdf, tmp_path / "cache") == first
+    assert len(calls) == 1
+
+    pdf.write_bytes(b"v2 is longer")
+    assert cached_sha256(pdf, tmp_path / "cache") != first
+    assert len(calls) == 2
+
+
+def test_extraction_cache_roundtrip(tmp_path: Path):
+    store = ExtractionCache(tmp_path)
+    assert store.get("abc", False) is None
+    extraction = from_pages(["Page one.", "", "Page three."], [(1, "One", 1)])
+    store.put("abc", False, extraction)
+    assert store.get("abc", False) == extraction
+    assert store.get("abc", True) is None
+
+
+def test_eviction_frees_space_down_to_the_low_water_mark(tmp_path: Path, monkeypatch):
+    cache = AudioCache(tmp_path / "cache", max_bytes=1000)
+    scans = []
+    real_entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or real_entries())
+    for idx in range(20):
+        src = tmp_path / f"{idx}.wav"
+        src.write_bytes(bytes(100))
+        cache.put(f"k{idx:03d}", src)
+        os.utime(cache._entry_path(f"k{idx:03d}"), (idx, idx))
+
+    assert cache.size_bytes <= 1000
+    # Each eviction makes room for a batch of writes instead of a single one.
+    assert len(scans) < 20 - 10
@@ -1,4 +1,14 @@
-from audiobooker.chaptering import build_chapters, detect_chapters
+import random
+import re
+
+from audiobooker.chaptering import (
+    _find_headings,
+    build_chapters,
+    chapters_from_outline,
+    detect_chapters,
+    iter_chapters,
+)
+from audiobooker.pdf_to_text import from_pages
 
 
 def test_detect_chapters_basic():
@@ -20,3 +30,101 @@ def test_build_chapters_fallback_segment():
     text = "word " * 4000
     chapters = build_chapters(text, mode="auto")
     assert len(chapters) >= 2
+
+
+def test_iter_chapters_matches_build_chapters():
+    pages = [
+        "Front matter line.",
+        "CHAPTER 1 The Beginning\nFirst chapter text.",
+        "",
+        "More of chapter one.\nCHAPTER 2 The Middle\nSecond chapter text.",
+        "CHAPTER 3 The End\nLast words.",
+    ]
+    expected = build_chapters(from_pages(pages).full_text, mode="auto")
+    assert list(iter_chapters(pages, mode="auto")) == expected
+    assert list(iter_chapters(["word " * 4000], mode="auto")) == build_chapters(
+        from_pages(["word " * 4000]).full_text, mode="auto"
+    )
+
+
+def test_chapters_from_outline_uses_bookmark_pages():
+    pages = [
+        "Title page.",
+        "Prologue\nIt begins.",
+        "More prologue.",
+        "Some heading text\nThe Storm\nRain fell.",
+        "",
+        "Untitled start of the end.",
+    ]
+    outline = [(1, "Prologue", 2), (2, "A subsection", 3), (1, "The Storm", 4), (1, "Epilogue", 6)]
+    extraction = from_pages(pages, outline)
+
+    chapters = chapters_from_outline(extraction)
+
+    assert [c.title for c in chapters] == ["Prologue", "The Storm", "Epilogue"]
+    assert chapters[0].text == "Prologue\nIt begins.\n\nMore prologue.\n\nSome heading text"
+    assert chapters[1].text == "The Storm\nRain fell."
+    assert chapters[2].text == "Untitled start of the end."
+    for chapter in chapters:
+        assert extraction.full_text[chapter.start_char : chapter.end_char].strip() == chapter.text
+
+
+def test_outline_entries_on_blank_pages_give_way_to_the_real_chapters():
+    pages = ["", "Chapter One\nIt begins.", "It goes on.", "Chapter Two\nIt ends.", ""]
+    outline = [(1, "Cover", 1), (1, "Chapter One", 2), (1, "Chapter Two", 4), (1, "Back", 5)]
+
+    chapters = chapters_from_outline(from_pages(pages, outline))
+
+    assert [c.title for c in chapters] == ["Chapter One", "Chapter Two"]
+    assert chapters[0].text == "Chapter One\nIt begins.\n\nIt goes on."
+    assert chapters[1].text == "Chapter Two\nIt ends."
+
+
+_LEGACY_HEADING_PATTERNS = [
+    re.compile(r"^\s*chapter\s+\d+[\.\: ]", re.IGNORECASE),
+    re.compile(r"^\s*chapter\s+[ivxlcdm]+[\.\: ]", re.IGNORECASE),
+    re.compile(r"^\s*chapter\s+[a-z]+[\.\: ]", re.IGNORECASE),
+    re.compile(r"^\s*part\s+[ivxlcdm]+[\.\: ]", re.IGNORECASE),
+    re.compile(r"^\s*part\s+\d+[\.\: ]", re.IGNORECASE),
+    re.compile(r"^\s*\d+\.\s+\S+"),
+]
+
+
+def _legacy_headings(text):
+    headings = []
+    cursor = 0
+    for line in text.splitlines():
+        stripped = line.strip()
+        if len(stripped) <= 80 and any(p.match(stripped) for p in _LEGACY_HEADING_PATTERNS):
+            headings.append((cursor, stripped))
+        cursor += len(line) + 1
+    return headings
+
+
+def test_heading_scan_matches_the_line_by_line_scan_on_a_million_words():
+    rng = random.Random(7)
+    vocab = ["the", "captain", "said", "plainly", "and", "ship", "partly", "calm", "7", "cold"]
+    headings = ["Chapter 12. The Sea", "CHAPTER IV: Night", "Part II. Home", "3. Departure", "chapter one "]
+    lines = []
+    words = 0
+    while words < 1_000_000:
+        if rng.random() < 0.002:
+            lines.append(rng.choice(headings))
+            continue
+        line = " ".join(rng.choice(vocab) for _ in range(12)).capitalize() + "."
+        lines.append(line)
+        words += 12
+    text = "\n".join(lines)
+
+    legacy = _legacy_headings(text)
+    assert _find_headings(text) == legacy
+    assert [(c.start_char, c.title) for c in detect_chapters(text)] == legacy
+
+
+def test_chapters_are_spans_over_the_shared_text():
+    text = "CHAPTER 1 Start\nAlpha.\nCHAPTER 2 Next\nBeta."
+    chapters = detect_chapters(text)
+    assert all(c.source is text for c in chapters)
+    assert not hasattr(chapters[0], "__dict__")
+    assert chapters[1].text == "CHAPTER 2 Next\nBeta."
+    assert chapters[1].without_text().text == ""
@@ -1,4 +1,7 @@
-from audiobooker.chunking import split_into_chunks
+import random
+import re
+
+from audiobooker.chunking import _ABBREVIATIONS, sentence_spans, split_into_chunks
 
 
 def test_chunking_respects_abbreviations():
@@ -13,3 +16,33 @@ def test_chunking_preserves_paragraph_gap_when_merging():
     chunks = split_into_chunks(text, min_chars=300, max_chars=500, preserve_paragraph_gaps=True)
     assert len(chunks) == 1
     assert "\n\n" in chunks[0]
+
+
+def _legacy_split_sentences(text):
+    for abbr in _ABBREVIATIONS:
+        pattern = re.compile(re.escape(abbr), re.IGNORECASE)
+        text = pattern.sub(lambda m: m.group(0).replace(".", "<prd>"), text)
+    parts = re.split(r"(?<=[.!?])\s+", text)
+    return [p.replace("<prd>", ".").strip() for p in parts if p.strip()]
+
+
+def test_sentence_scanner_matches_legacy():
+    rng = random.Random(11)
+    vocab = ["the", "items", "Dr.", "Mr.", "e.g.", "said", "i.e.", "ETC.", "ship", "vs.", "Prof.", "calm"]
+    paragraphs = []
+    for _ in range(4000):
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            words = " ".join(rng.choice(vocab) for _ in range(rng.randint(1, 14)))
+            sentences.append(words.capitalize() + rng.choice([".", "!", "?", ".", "...", ".)"]))
+        paragraphs.append(rng.choice([" ", "  ", "\n", " \t"]).join(sentences))
+
+    legacy = [_legacy_split_sentences(p) for p in paragraphs]
+    assert [[p[s:e] for s, e in sentence_spans(p)] for p in paragraphs] == legacy
+
+
+def test_sentence_spans_use_the_language_abbreviations():
+    text = "Er kam z.B. spät. Dann ging er."
+    assert [text[s:e] for s, e in sentence_spans(text, "de")] == ["Er kam z.B. spät.", "Dann ging er."]
+    assert len(sentence_spans(text, "en")) == 3
+    assert sentence_spans("Il vit à Adam. Puis M. Dupont arrive.", "fr") == [(0, 14), (15, 37)]
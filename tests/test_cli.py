@@ -0,0 +1,121 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from _audio import write_wav
+
+from audiobooker import cli
+from audiobooker.chaptering import Chapter
+from audiobooker.pdf_to_text import from_pages
+
+PAGES = [
+    "CHAPTER 1 The Start\n\nIt was a quiet morning. The ship sat still.",
+    "CHAPTER 2 The Storm\n\nThe wind rose. Nobody slept that night.",
+]
+
+
+class _FakeEngine:
+    def __init__(self, calls: Counter):
+        self.calls = calls
+
+    def synthesize(self, text: str, path: Path) -> None:
+        self.calls["synth"] += 1
+        write_wav(path, b"\x01\x00" * 2205)
+
+    def close(self) -> None:
+        pass
+
+
+def _counting(calls: Counter, name: str, fn):
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def test_unchanged_second_run_skips_every_stage_and_voice_changes_resynthesize(tmp_path: Path, monkeypatch):
+    calls: Counter = Counter()
+    monkeypatch.setattr(cli, "extract_text", lambda *a, **k: calls.update(["extract"]) or from_pages(PAGES))
+    monkeypatch.setattr(cli, "split_into_chunks", _counting(calls, "chunk", cli.split_into_chunks))
+    monkeypatch.setattr(cli, "_encode_chapter", _counting(calls, "encode", cli._encode_chapter))
+    monkeypatch.setattr(cli, "_make_piper_engine", lambda args: _FakeEngine(calls))
+    monkeypatch.setattr(cli, "ffmpeg_exists", lambda: False)
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF fake")
+    voice = tmp_path / "voice.onnx"
+    voice.write_bytes(b"model v1")
+    argv = ["--pdf", str(pdf), "--voice", str(voice), "--out", str(tmp_path / "out"), "--format", "wav", "--no-cache"]
+
+    cli.main(argv)
+    first = dict(calls)
+    assert first["extract"] == 1 and first["synth"] >= 2 and first["encode"] == 2
+
+    cli.main(argv)
+    assert dict(calls) == first
+
+    # Same voice name, new model file: only synthesis and what follows run again.
+    voice.write_bytes(b"model v2")
+    cli.main(argv)
+    assert calls["synth"] == 2 * first["synth"]
+    assert calls["extract"] == 1 and calls["chunk"] == first["chunk"]
+
+
+def test_chapters_without_chunks_are_skipped(tmp_path: Path, monkeypatch):
+    split = cli.split_into_chunks
+    monkeypatch.setattr(cli, "extract_text", lambda *a, **k: from_pages(PAGES))
+    monkeypatch.setattr(cli, "split_into_chunks", lambda text, **k: [] if "Storm" in text else split(text, **k))
+    monkeypatch.setattr(cli, "_make_piper_engine", lambda args: _FakeEngine(Counter()))
+    monkeypatch.setattr(cli, "ffmpeg_exists", lambda: False)
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF fake")
+    out = tmp_path / "out"
+
+    cli.main(["--pdf", str(pdf), "--out", str(out), "--format", "wav", "--no-cache"])
+
+    assert sorted(p.name for p in out.glob("*.wav")) == ["01_CHAPTER_1_The_Start.wav", "book.wav"]
+
+
+def test_stream_copy_falls_back_to_reencoding_when_a_duration_is_unreadable(tmp_path: Path, monkeypatch):
+    encoded = []
+
+    def unreadable_duration(*args, **kwargs):
+        raise ValueError("could not convert string to float: 'N/A'")
+
+    monkeypatch.setattr(cli, "ffmpeg_exists", lambda: True)
+    monkeypatch.setattr(cli, "assemble_copy", unreadable_duration)
+    monkeypatch.setattr(cli, "concat_audio", lambda files, out, **kwargs: encoded.append((files, out)))
+    args = cli.parse_args(["--pdf", "book.pdf", "--format", "mp3", "--assembly", "copy"])
+    chapters = [Chapter("One", 0, 3, "One"), Chapter("Two", 3, 6, "Two")]
+    files = [tmp_path / "01.mp3", tmp_path / "02.mp3"]
+
+    merged = cli._merge_book(args, tmp_path, "book", chapters, files)
+
+    assert merged == tmp_path / "book.mp3"
+    assert encoded == [(files, merged)]
+
+
+def test_natural_loudness_is_measured_in_the_rendering_pass_and_kept(tmp_path: Path, monkeypatch):
+    pytest.importorskip("numpy")
+    calls: Counter = Counter()
+    monkeypatch.setattr(cli, "extract_text", lambda *a, **k: from_pages(PAGES))
+    monkeypatch.setattr(cli, "_make_piper_engine", lambda args: _FakeEngine(Counter()))
+    monkeypatch.setattr(cli, "ffmpeg_exists", lambda: True)
+    monkeypatch.setattr(cli, "mastered_loudness", _counting(calls, "measure", cli.mastered_loudness))
+    monkeypatch.setattr(cli, "master_chunks", _counting(calls, "master", cli.master_chunks))
+    monkeypatch.setattr(cli, "encode_pcm", lambda blocks, fmt, path, _: path.write_bytes(b"".join(blocks)))
+    monkeypatch.setattr(cli, "_merge_book", lambda args, out_dir, *rest: out_dir / f"book.{args.format}")
+    pdf = tmp_path / "book.pdf"
+    pdf.write_bytes(b"%PDF fake")
+    argv = ["--pdf", str(pdf), "--out", str(tmp_path / "out"), "--no-cache", "--natural", "--normalize"]
+    argv += ["--mastering", "numpy"]
+
+    cli.main(argv + ["--format", "mp3"])
+    # One pass per chapter: the measured chain output is rendered with the gain applied.
+    assert calls == {"measure": 2}
+    assert not list((tmp_path / "out" / "chunks").glob(".*.mastered.wav"))
+
+    cli.main(argv + ["--format", "m4b"])
+    # An encode-only rebuild reuses the stored measurements.
+    assert calls == {"measure": 2, "master": 2}
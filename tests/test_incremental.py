@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from audiobooker.chunking import split_into_chunks
+from audiobooker.incremental import relocate_renders, split_into_chunks_aligned
+
+
+def _paragraphs(count: int) -> str:
+    return "\n\n".join(
+        f"Paragraph {i} opens here. It carries a second sentence. And a third one closes it."
+        for i in range(count)
+    )
+
+
+def test_aligned_chunking_keeps_unchanged_chunks_verbatim():
+    old_text = _paragraphs(12)
+    old_chunks = split_into_chunks(old_text, min_chars=150, max_chars=300)
+    new_text = old_text.replace("Paragraph 5 opens", "Paragraph five opens")
+
+    new_chunks = split_into_chunks_aligned(new_text, old_chunks, min_chars=150, max_chars=300)
+
+    changed = [c for c in new_chunks if c not in old_chunks]
+    assert len(changed) == 1
+    assert "Paragraph five opens" in changed[0]
+    assert len(new_chunks) == len(old_chunks)
+
+
+def test_relocate_renders_handles_swapped_paths(tmp_path: Path):
+    a = tmp_path / "a.wav"
+    b = tmp_path / "b.wav"
+    a.write_bytes(b"A")
+    b.write_bytes(b"B")
+
+    relocate_renders([(a, b), (b, a)], tmp_path / "staging")
+
+    assert a.read_bytes() == b"B"
+    assert b.read_bytes() == b"A"
+    assert not (tmp_path / "staging").exists()
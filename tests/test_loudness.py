@@ -0,0 +1,40 @@
+import math
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from _audio import write_wav  # noqa: E402
+
+from audiobooker.loudness import integrated_loudness, measure_wav, static_gain  # noqa: E402
+
+
+def _wav(path: Path, samples, rate: int = 48000) -> Path:
+    return write_wav(path, samples, rate)
+
+
+def _tone(seconds: float, dbfs: float, rate: int = 48000):
+    t = np.arange(int(seconds * rate)) / rate
+    return 10 ** (dbfs / 20) * np.sin(2 * math.pi * 1000 * t)
+
+
+@pytest.mark.parametrize("rate", [22050, 48000])
+def test_measure_wav_matches_the_bs1770_reference_tone(tmp_path: Path, rate):
+    # A 1 kHz tone at -23 dBFS reads -23 LUFS on two channels, so -26 on one.
+    path = _wav(tmp_path / "tone.wav", _tone(5, -23, rate), rate)
+    assert integrated_loudness([measure_wav(path)]) == pytest.approx(-26.0, abs=0.1)
+
+
+def test_chunk_measurements_combine_like_the_joined_audio(tmp_path: Path):
+    quiet = _tone(6, -30)
+    loud = _tone(3, -14)
+    pieces = [measure_wav(_wav(tmp_path / "a.wav", quiet)), measure_wav(_wav(tmp_path / "b.wav", loud))]
+    joined = measure_wav(_wav(tmp_path / "ab.wav", np.concatenate([quiet, loud])))
+
+    # Only the few gating blocks that straddle the seam differ.
+    assert integrated_loudness(pieces) == pytest.approx(integrated_loudness([joined]), abs=0.3)
+    assert static_gain(pieces, -20.0) == pytest.approx(-20.0 - integrated_loudness(pieces), abs=0.01)
+    # The louder piece peaks at -14 dBFS, so the gain stops at 13 dB below the -1 dB ceiling.
+    assert static_gain(pieces, 0.0) == pytest.approx(13.0, abs=0.05)
+    assert integrated_loudness([None, {"blocks": [], "peak": 0.0}]) is None
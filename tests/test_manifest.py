@@ -1,7 +1,7 @@
 import json
 from pathlib import Path
 
-from audiobooker.manifest import create_manifest, load_manifest
+from audiobooker.manifest import ChunkRecord, create_manifest, load_manifest, save_manifest
 
 
 def test_manifest_roundtrip(tmp_path: Path):
@@ -14,3 +14,51 @@ def test_manifest_roundtrip(tmp_path: Path):
     assert loaded is not None
     assert loaded.pdf_hash == manifest.pdf_hash
     assert loaded.settings == settings
+
+
+def test_manifest_chunk_lookup_and_upsert(tmp_path: Path):
+    pdf = tmp_path / "sample.pdf"
+    pdf.write_bytes(b"dummy")
+    manifest = create_manifest(str(pdf), tmp_path, {}, [])
+    manifest.add_chunk(ChunkRecord(2, 1, 10, "b.wav"))
+    manifest.add_chunk(ChunkRecord(1, 1, 10, "a.wav"))
+    manifest.add_chunk(ChunkRecord(1, 1, 12, "a2.wav"))
+    assert manifest.get_chunk(1, 1).path == "a2.wav"
+    assert manifest.get_chunk(3, 1) is None
+    assert [c.path for c in manifest.chunks] == ["a2.wav", "b.wav"]
+    assert isinstance(manifest.chunks, tuple)
+    save_manifest(tmp_path, manifest)
+    manifest.set_chunk_analysis(1, 1, {"trim": [40, 900]})
+    assert manifest.get_chunk(1, 1).trim == [40, 900]
+    assert manifest.get_chunk(1, 1).loudness is None
+    manifest.close()
+
+
+def test_legacy_json_manifest_is_migrated(tmp_path: Path):
+    legacy = {
+        "pdf_path": "book.pdf",
+        "pdf_hash": "abc",
+        "settings": {"tts": "piper"},
+        "chapters": [],
+        "chunks": [{"chapter_index": 1, "chunk_index": 1, "text_chars": 5, "path": "x.wav"}],
+        "chapter_outputs": [str(tmp_path / "01_Intro.mp3")],
+        "merged_output": None,
+    }
+    (tmp_path / "audiobook_manifest.json").write_text(json.dumps(legacy), encoding="utf-8")
+    loaded = load_manifest(tmp_path)
+    assert loaded.pdf_hash == "abc"
+    assert loaded.get_chunk(1, 1).path == "x.wav"
+    assert loaded.chapter_outputs == [str(tmp_path / "01_Intro.mp3")]
+    assert not (tmp_path / "audiobook_manifest.json").exists()
+    loaded.close()
+
+
+def test_stage_artifact_requires_matching_fingerprint(tmp_path: Path):
+    pdf = tmp_path / "sample.pdf"
+    pdf.write_bytes(b"dummy")
+    manifest = create_manifest(str(pdf), tmp_path, {}, [])
+    manifest.set_stage("extract", "fp1", ["page one", "page two"])
+    assert manifest.stage_artifact("extract", "fp1") == ["page one", "page two"]
+    assert manifest.stage_artifact("extract", "fp2") is None
+    assert manifest.stage_fingerprint("extract") == "fp1"
+    manifest.close()
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from _audio import write_wav  # noqa: E402
+
+from audiobooker.audio_merge import concat_audio  # noqa: E402
+from audiobooker.dsp import read_samples  # noqa: E402
+from audiobooker.loudness import integrated_loudness, measure_wav, static_gain  # noqa: E402
+from audiobooker.mastering import (  # noqa: E402
+    master_chunks,
+    master_samples,
+    master_to_wav,
+    mastered_loudness,
+    scaled_pcm16,
+)
+from audiobooker.pcm import read_wav_info  # noqa: E402
+from audiobooker.utils import ffmpeg_exists  # noqa: E402
+
+
+def _speech_like(path: Path, seconds: float, rate: int = 22050, seed: int = 1) -> Path:
+    """Noise with a syllable-rate envelope and swings in level, loosely like narration."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    envelope = np.abs(np.sin(2 * np.pi * 3.5 * t)) * (0.2 + 0.8 * (np.sin(2 * np.pi * 0.2 * t) > 0))
+    samples = np.clip(0.6 * envelope * rng.standard_normal(t.size), -1, 1)
+    return write_wav(path, samples, rate)
+
+
+def test_master_to_wav_keeps_timing_and_peaks(tmp_path: Path):
+    chunks = [_speech_like(tmp_path / f"{i}.wav", seconds, seed=i) for i, seconds in enumerate([2.0, 1.5])]
+    out = tmp_path / "chapter.wav"
+
+    master_to_wav(chunks, out, [220], gain_db=3.0)
+
+    info = read_wav_info(out)
+    assert info.frames == sum(read_wav_info(c).frames for c in chunks) + info.format.frames(220)
+    samples, _ = read_samples(out)
+    assert np.abs(samples).max() <= 1.0
+    # The filters ring briefly into the gap between chunks, which is silent after that.
+    gap = samples[:, read_wav_info(chunks[0]).frames :][:, : info.format.frames(220)]
+    assert not gap[:, info.format.frames(50) :].any()
+
+
+def test_chunks_are_mastered_as_one_chapter(tmp_path: Path):
+    chunks = [_speech_like(tmp_path / f"{i}.wav", seconds, seed=i) for i, seconds in enumerate([1.3, 0.01, 2.2, 0.7])]
+    gaps = [220, 0, 90]
+    pieces = []
+    for idx, chunk in enumerate(chunks):
+        samples, fmt = read_samples(chunk)
+        pieces.append(samples)
+        if idx < len(gaps):
+            pieces.append(np.zeros((1, fmt.frames(gaps[idx]))))
+    whole = np.round(master_samples(np.concatenate(pieces, axis=1), fmt.sample_rate, -3.0) * 32767)
+
+    master_to_wav(chunks, tmp_path / "chapter.wav", gaps, -3.0)
+
+    chapter, _ = read_samples(tmp_path / "chapter.wav")
+    assert chapter.shape == whole.shape
+    assert np.abs(np.round(chapter * 32768) - whole).max() <= 1
+
+
+def test_natural_output_lands_on_the_loudness_target(tmp_path: Path):
+    chunks = [_speech_like(tmp_path / f"{i}.wav", 8.0, seed=i) for i in range(3)]
+    gain_db = static_gain(mastered_loudness(chunks), -24.0)
+
+    master_to_wav(chunks, tmp_path / "numpy.wav", [220, 220], gain_db)
+
+    assert integrated_loudness([measure_wav(tmp_path / "numpy.wav")]) == pytest.approx(-24.0, abs=0.5)
+    if ffmpeg_exists():
+        concat_audio(chunks, tmp_path / "ffmpeg.wav", fmt="wav", natural=True, gain_db=gain_db)
+        assert integrated_loudness([measure_wav(tmp_path / "ffmpeg.wav")]) == pytest.approx(-24.0, abs=0.5)
+
+
+def test_kept_chain_output_renders_like_a_second_pass(tmp_path: Path):
+    chunks = [_speech_like(tmp_path / f"{i}.wav", 3.0, seed=i) for i in range(2)]
+    kept = tmp_path / "mastered.wav"
+
+    measurements = mastered_loudness(chunks, [220], output_path=kept)
+    gain_db = static_gain(measurements, -24.0)
+
+    assert measurements == mastered_loudness(chunks, [220])
+    _, scaled = scaled_pcm16(kept, gain_db)
+    _, rendered = master_chunks(chunks, [220], gain_db)
+    ours = np.frombuffer(b"".join(scaled), dtype="<i2").astype(int)
+    theirs = np.frombuffer(b"".join(rendered), dtype="<i2").astype(int)
+    assert ours.shape == theirs.shape
+    assert np.abs(ours - theirs).max() <= 1
+
+
+@pytest.mark.skipif(not ffmpeg_exists(), reason="ffmpeg not installed")
+def test_numpy_chain_tracks_the_ffmpeg_filters(tmp_path: Path):
+    source = _speech_like(tmp_path / "speech.wav", 60.0)
+
+    concat_audio([source], tmp_path / "ffmpeg.wav", fmt="wav", natural=True)
+    master_to_wav([source], tmp_path / "numpy.wav")
+
+    expected = integrated_loudness([measure_wav(tmp_path / "ffmpeg.wav")])
+    assert integrated_loudness([measure_wav(tmp_path / "numpy.wav")]) == pytest.approx(expected, abs=0.1)
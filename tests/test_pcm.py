@@ -0,0 +1,44 @@
+import os
+import struct
+import wave
+from pathlib import Path
+
+import pytest
+
+from _audio import write_wav
+
+from audiobooker.pcm import WavFormat, concat_wavs, read_wav_info
+
+
+@pytest.mark.parametrize("copy_file_range", [True, False])
+def test_concat_wavs_streams_inputs_with_inline_pauses(tmp_path: Path, monkeypatch, copy_file_range):
+    if not copy_file_range:
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+    a = write_wav(tmp_path / "a.wav", b"\x01\x00" * 5)
+    b = write_wav(tmp_path / "b.wav", b"\x02\x00" * 3)
+    out = tmp_path / "out.wav"
+
+    concat_wavs([a, b, a], out, [1000 / 22050 * 2] * 2)
+
+    with wave.open(str(out), "rb") as wf:
+        assert wf.getframerate() == 22050
+        data = wf.readframes(wf.getnframes())
+    assert data == b"\x01\x00" * 5 + b"\x00\x00" * 2 + b"\x02\x00" * 3 + b"\x00\x00" * 2 + b"\x01\x00" * 5
+
+
+def test_read_wav_info_skips_extra_chunks_and_rejects_mismatched_rates(tmp_path: Path, monkeypatch):
+    fmt_chunk = struct.pack("<4sIHHIIHH", b"fmt ", 16, 1, 1, 24000, 48000, 2, 16)
+    list_chunk = struct.pack("<4sI", b"LIST", 3) + b"abc\x00"
+    data_chunk = struct.pack("<4sI", b"data", 0xFFFFFFFF) + b"\x05\x00" * 4
+    body = b"WAVE" + fmt_chunk + list_chunk + data_chunk
+    path = tmp_path / "odd.wav"
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+
+    info = read_wav_info(path)
+    assert info.format == WavFormat(channels=1, sample_rate=24000, sample_width=2)
+    assert info.frames == 4
+
+    # Without NumPy there is no converter for the 24 kHz input.
+    monkeypatch.setattr("audiobooker.dsp.numpy_available", lambda: False)
+    with pytest.raises(RuntimeError, match="mismatch"):
+        concat_wavs([write_wav(tmp_path / "a.wav", b"\x00\x00"), path], tmp_path / "out.wav")
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from audiobooker.pdf_to_text import extract_text
+
+
+FAKE_FITZ = '''
+class _Page:
+    def __init__(self, index):
+        self.index = index
+
+    def get_text(self):
+        if self.index == 3:
+            raise ValueError("broken page")
+        return f"Page {self.index} from fitz."
+
+
+class _Doc:
+    def __len__(self):
+        return 20
+
+    def __getitem__(self, index):
+        return _Page(index)
+
+    def close(self):
+        pass
+
+
+def open(path):
+    return _Doc()
+'''
+
+FAKE_PDFPLUMBER = '''
+class _Page:
+    def __init__(self, index):
+        self.index = index
+
+    def extract_text(self):
+        return f"Page {self.index} from pdfplumber."
+
+    def flush_cache(self):
+        pass
+
+
+class _Pdf:
+    pages = [_Page(i) for i in range(20)]
+
+    def close(self):
+        pass
+
+
+def open(path):
+    return _Pdf()
+'''
+
+
+@pytest.fixture
+def fake_backends(tmp_path: Path, monkeypatch):
+    (tmp_path / "fitz.py").write_text(FAKE_FITZ, encoding="utf-8")
+    (tmp_path / "pdfplumber.py").write_text(FAKE_PDFPLUMBER, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "fitz", raising=False)
+    monkeypatch.delitem(sys.modules, "pdfplumber", raising=False)
+    yield
+    sys.modules.pop("fitz", None)
+    sys.modules.pop("pdfplumber", None)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_extract_text_falls_back_per_page_and_keeps_order(fake_backends, workers):
+    pages = extract_text("book.pdf", keep_headers=True, workers=workers).pages
+    assert len(pages) == 20
+    assert pages[2] == "Page 2 from fitz."
+    assert pages[3] == "Page 3 from pdfplumber."
+    assert pages[19] == "Page 19 from fitz."
@@ -0,0 +1,57 @@
+import wave
+from pathlib import Path
+
+from _audio import write_wav
+
+from audiobooker.cache import AudioCache
+from audiobooker.render import ChunkRenderer
+from audiobooker.scheduler import ChunkJob
+
+
+def _fake_synth(calls):
+    def synthesize(text: str, path: Path) -> None:
+        calls.append(text)
+        write_wav(path, b"\x01\x00" * 100)
+
+    return synthesize
+
+
+def test_sentence_mode_reuses_sentences_across_chunk_layouts(tmp_path: Path):
+    calls = []
+    cache = AudioCache(tmp_path / "cache", max_bytes=10**9)
+    renderer = ChunkRenderer(_fake_synth(calls), ("piper", "v", ""), 1.0, cache=cache, unit="sentence")
+
+    renderer.render(ChunkJob(1, 1, "One. Two.\n\nThree.", tmp_path / "a.wav"))
+    assert calls == ["One.", "Two.", "Three."]
+    renderer.render(ChunkJob(1, 1, "Two.\n\nThree. One.", tmp_path / "b.wav"))
+    assert len(calls) == 3
+
+    with wave.open(str(tmp_path / "a.wav"), "rb") as wf:
+        gaps = int(22050 * 0.2) + int(22050 * 0.45)
+        assert wf.getnframes() == 300 + gaps
+
+
+def test_repeated_chunks_render_once(tmp_path: Path):
+    calls = []
+    renderer = ChunkRenderer(_fake_synth(calls), ("piper", "v", ""), 1.0)
+    for idx, text in enumerate(["* * *", "Body text.", "*  *  *"], start=1):
+        renderer.render(ChunkJob(1, idx, text, tmp_path / f"{idx}.wav"))
+
+    assert calls == ["* * *", "Body text."]
+    assert (tmp_path / "3.wav").read_bytes() == (tmp_path / "1.wav").read_bytes()
+    stats = renderer.dedup_stats()["chunks"]
+    assert stats["total"] == 3 and stats["unique"] == 2
+    assert stats["hit_ratio"] == round(1 / 3, 4)
+
+
+def test_repeated_sentences_are_reused_across_chunks(tmp_path: Path):
+    calls = []
+    renderer = ChunkRenderer(_fake_synth(calls), ("piper", "v", ""), 1.0, unit="sentence", work_dir=tmp_path / "work")
+    renderer.render(ChunkJob(1, 1, "Scene break. Hello.", tmp_path / "a.wav"))
+    renderer.render(ChunkJob(1, 2, "Scene break. Bye.", tmp_path / "b.wav"))
+
+    assert calls == ["Scene break.", "Hello.", "Bye."]
+    stats = renderer.dedup_stats()["sentences"]
+    assert stats["hits"] == 1 and stats["hit_ratio"] == 0.25
+    renderer.close()
+    assert list((tmp_path / "work").iterdir()) == []
@@ -0,0 +1,81 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from audiobooker.scheduler import BackgroundPool, ChunkJob, run_chunk_jobs
+
+
+def _plan(counts):
+    return [
+        (chap, [ChunkJob(chap, idx, f"text {chap}.{idx}", Path(f"{chap}_{idx}.wav")) for idx in range(1, n + 1)])
+        for chap, n in counts
+    ]
+
+
+def test_run_chunk_jobs_reports_chapters_after_their_chunks():
+    main_thread = threading.get_ident()
+    events = []
+
+    def synthesize(job):
+        time.sleep(0.001 * (5 - job.chunk_index))
+
+    def chunk_done(job):
+        assert threading.get_ident() == main_thread
+        events.append(("chunk", job.chapter_index, job.chunk_index))
+
+    def chapter_done(chapter_index):
+        events.append(("chapter", chapter_index))
+
+    run_chunk_jobs(_plan([(1, 3), (2, 0), (3, 4)]), synthesize, workers=4, on_chunk_done=chunk_done, on_chapter_done=chapter_done)
+
+    assert ("chapter", 2) in events
+    for chap, n in [(1, 3), (3, 4)]:
+        chapter_pos = events.index(("chapter", chap))
+        for idx in range(1, n + 1):
+            assert events.index(("chunk", chap, idx)) < chapter_pos
+
+
+def test_run_chunk_jobs_propagates_failures():
+    def synthesize(job):
+        if job.chunk_index == 2:
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_chunk_jobs(_plan([(1, 3)]), synthesize, workers=2)
+
+
+def test_run_chunk_jobs_starts_before_the_plan_is_complete():
+    started = threading.Event()
+
+    def chapters():
+        yield from _plan([(1, 2)])
+        assert started.wait(5)
+        yield from _plan([(2, 2)])
+
+    run_chunk_jobs(chapters(), lambda job: started.set(), workers=2, max_pending=1)
+    assert started.is_set()
+
+
+def test_background_pool_runs_jobs_concurrently_and_keeps_submission_order():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def encode(name):
+        barrier.wait()
+        return name.upper()
+
+    with BackgroundPool(workers=2) as pool:
+        pool.submit(2, encode, "b")
+        pool.submit(1, encode, "a")
+        assert pool.drain() == [(2, "B"), (1, "A")]
+
+
+def test_background_pool_propagates_failures():
+    def encode(name):
+        raise RuntimeError(f"ffmpeg failed on {name}")
+
+    with pytest.raises(RuntimeError, match="ffmpeg failed on a"):
+        with BackgroundPool(workers=2) as pool:
+            pool.submit(1, encode, "a")
+            pool.drain()
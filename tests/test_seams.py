@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from _audio import write_wav  # noqa: E402
+
+from audiobooker.dsp import read_samples  # noqa: E402
+from audiobooker.pcm import read_wav_info  # noqa: E402
+from audiobooker.seams import MARGIN_MS, join_trimmed, speech_bounds  # noqa: E402
+
+RATE = 22050
+
+
+def _chunk(path: Path, lead_ms: int, speech_ms: int, tail_ms: int, seed: int = 0) -> Path:
+    rng = np.random.default_rng(seed)
+    speech = 0.3 * rng.standard_normal(RATE * speech_ms // 1000)
+    samples = np.concatenate([np.zeros(RATE * lead_ms // 1000), speech, np.zeros(RATE * tail_ms // 1000)])
+    return write_wav(path, samples, RATE)
+
+
+def test_speech_bounds_trims_edge_silence_to_the_margin(tmp_path: Path):
+    path = _chunk(tmp_path / "a.wav", 300, 500, 400)
+    margin = RATE * MARGIN_MS // 1000
+
+    start, end = speech_bounds(path)
+
+    assert start == pytest.approx(RATE * 300 // 1000 - margin, abs=RATE // 100)
+    assert end == pytest.approx(RATE * 800 // 1000 + margin, abs=RATE // 100)
+    assert speech_bounds(_chunk(tmp_path / "silent.wav", 200, 0, 0)) == [0, 0]
+
+
+def test_join_trimmed_uses_exact_gaps_and_fades_the_edges(tmp_path: Path):
+    chunks = [_chunk(tmp_path / "a.wav", 300, 500, 400, 1), _chunk(tmp_path / "b.wav", 100, 700, 250, 2)]
+    bounds = [speech_bounds(c) for c in chunks]
+    out = tmp_path / "joined.wav"
+
+    join_trimmed(chunks, out, bounds, [220])
+
+    gap = RATE * 220 // 1000
+    first = bounds[0][1] - bounds[0][0]
+    assert read_wav_info(out).frames == first + gap + bounds[1][1] - bounds[1][0]
+    joined, _ = read_samples(out)
+    source, _ = read_samples(chunks[0])
+    assert not joined[:, first : first + gap].any()
+    # Past the fade, the audio is copied unchanged.
+    middle = slice(bounds[0][0] + 1000, bounds[0][1] - 1000)
+    assert np.array_equal(joined[:, 1000 : first - 1000], source[:, middle])
+    assert abs(joined[0, 0]) < 0.01 and abs(joined[0, first - 1]) < 0.01
@@ -0,0 +1,177 @@
+import json
+import os
+import stat
+import sys
+import threading
+import time
+import types
+import wave
+from pathlib import Path
+
+import pytest
+
+from audiobooker.tts_piper import PiperOnnxEngine, PiperPool, PiperWorker, default_thread_budget
+
+
+FAKE_PIPER = """#!{python}
+import sys, time, wave
+from pathlib import Path
+
+args = sys.argv[1:]
+out_dir = Path(args[args.index("--output_dir") + 1])
+count_file = out_dir.parent / "starts.txt"
+with open(count_file, "a") as f:
+    f.write("start\\n")
+for line in sys.stdin:
+    if "CRASH" in line and not (out_dir.parent / "crashed").exists():
+        (out_dir.parent / "crashed").write_text("1")
+        sys.exit(3)
+    path = out_dir / f"{{time.monotonic_ns()}}.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(22050)
+        wf.writeframes(b"\\x00\\x00" * len(line))
+    print(path, flush=True)
+"""
+
+
+@pytest.fixture
+def fake_piper(tmp_path: Path, monkeypatch):
+    if os.name == "nt":
+        pytest.skip("fake piper script requires a POSIX shebang")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "piper"
+    script.write_text(FAKE_PIPER.format(python=sys.executable), encoding="utf-8")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"model")
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    return model
+
+
+def test_piper_pool_reuses_one_process(fake_piper: Path, tmp_path: Path):
+    with PiperPool(voice=str(fake_piper)) as pool:
+        for idx in range(3):
+            pool.synthesize("Hello there.\n\nGeneral Kenobi.", tmp_path / "out" / f"{idx}.wav")
+    assert (tmp_path / "starts.txt").read_text().count("start") == 1
+    with wave.open(str(tmp_path / "out" / "2.wav"), "rb") as wf:
+        assert wf.getnframes() > 0
+
+
+def test_piper_pool_restarts_crashed_worker(fake_piper: Path, tmp_path: Path):
+    with PiperPool(voice=str(fake_piper)) as pool:
+        pool.synthesize("CRASH once", tmp_path / "a.wav")
+    assert (tmp_path / "a.wav").exists()
+    assert (tmp_path / "starts.txt").read_text().count("start") == 2
+
+
+def test_piper_worker_finds_output_in_a_directory_with_spaces(fake_piper: Path, tmp_path: Path, monkeypatch):
+    spaced = tmp_path / "First Last"
+    spaced.mkdir()
+    monkeypatch.setattr("tempfile.tempdir", str(spaced))
+    worker = PiperWorker(fake_piper, 1.0, timeout=10)
+    try:
+        worker.synthesize("Hello there.", tmp_path / "a.wav")
+    finally:
+        worker.stop()
+    assert (tmp_path / "a.wav").exists()
+
+
+def test_default_thread_budget_splits_cores(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 32)
+    assert default_thread_budget(4) == 8
+    assert default_thread_budget(64) == 1
+
+
+def _fake_onnx_modules(monkeypatch, feeds):
+    np = pytest.importorskip("numpy")
+
+    class Session:
+        def __init__(self, path, sess_options=None, providers=None):
+            self.threads = sess_options.intra_op_num_threads
+            self.busy = 0
+            onnxruntime.sessions.append(self)
+
+        def get_inputs(self):
+            return [types.SimpleNamespace(name=name) for name in ("input", "input_lengths", "scales")]
+
+        def run(self, outputs, inputs):
+            self.busy += 1
+            time.sleep(0.005)
+            feeds.append(dict(inputs, session=self, shared=self.busy > 1))
+            self.busy -= 1
+            return [np.array([[[0.5, -0.25, 0.1]]], dtype=np.float32)]
+
+    class SessionOptions:
+        def add_session_config_entry(self, key, value):
+            pass
+
+    onnxruntime = types.SimpleNamespace(
+        SessionOptions=SessionOptions,
+        InferenceSession=Session,
+        ExecutionMode=types.SimpleNamespace(ORT_SEQUENTIAL=0),
+        sessions=[],
+    )
+    phonemize = types.SimpleNamespace(
+        phonemize_espeak=lambda text, voice: [["a", "b", "?"], [], ["b"]],
+        phonemize_codepoints=lambda text: [list(text)],
+    )
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    monkeypatch.setitem(sys.modules, "piper_phonemize", phonemize)
+
+
+def _onnx_voice(tmp_path: Path) -> Path:
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"model")
+    config = {
+        "audio": {"sample_rate": 16000},
+        "inference": {"noise_scale": 0.5, "length_scale": 1.0, "noise_w": 0.7},
+        "phoneme_id_map": {"_": [0], "^": [1], "$": [2], "a": [5], "b": [6]},
+    }
+    Path(f"{model}.json").write_text(json.dumps(config), encoding="utf-8")
+    return model
+
+
+def test_piper_onnx_engine_feeds_phoneme_ids_and_writes_wav(tmp_path: Path, monkeypatch):
+    feeds = []
+    _fake_onnx_modules(monkeypatch, feeds)
+    model = _onnx_voice(tmp_path)
+
+    with PiperOnnxEngine(voice=str(model), speed=1.0, sentence_silence=0.1) as engine:
+        engine.synthesize("Ab. B.", tmp_path / "out.wav")
+
+    # BOS, each known phoneme followed by PAD, EOS; unknown phonemes are dropped.
+    assert [f["input"].tolist() for f in feeds] == [[[1, 5, 0, 6, 0, 2]], [[1, 6, 0, 2]]]
+    assert [f["input_lengths"].tolist() for f in feeds] == [[6], [4]]
+    assert feeds[0]["scales"].tolist() == pytest.approx([0.5, 1.0, 0.7])
+    with wave.open(str(tmp_path / "out.wav"), "rb") as wf:
+        assert (wf.getframerate(), wf.getnchannels(), wf.getsampwidth()) == (16000, 1, 2)
+        frames = wf.readframes(wf.getnframes())
+    samples = list(memoryview(frames).cast("h"))
+    # Each sentence is peak-normalized, with 100 ms of silence between sentences.
+    assert samples == [32767, -16383, 6553] + [0] * 1600 + [32767, -16383, 6553]
+
+
+def test_piper_onnx_workers_each_get_their_own_session_and_share_of_the_cores(tmp_path: Path, monkeypatch):
+    feeds = []
+    _fake_onnx_modules(monkeypatch, feeds)
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    model = _onnx_voice(tmp_path)
+
+    with PiperOnnxEngine(voice=str(model), workers=4) as engine:
+        threads = [
+            threading.Thread(target=engine.synthesize, args=("Ab.", tmp_path / f"{idx}.wav")) for idx in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    sessions = sys.modules["onnxruntime"].sessions
+    assert [session.threads for session in sessions] == [2, 2, 2, 2]
+    assert len(feeds) == 16
+    # A session never runs two inferences at once, so each gets its 2 threads to itself.
+    assert not any(f["shared"] for f in feeds)
@@ -0,0 +1,82 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from audiobooker.tts_xtts import XTTSEngine
+
+
+class _FakeTTS:
+    loads = 0
+
+    def __init__(self, model_name: str):
+        type(self).loads += 1
+        self.speakers = ["Ana"]
+
+    def tts(self, text, **kwargs):
+        return [0.0]
+
+    def tts_to_file(self, text, file_path, **kwargs):
+        Path(file_path).write_bytes(b"RIFF")
+
+
+def test_xtts_engine_loads_model_once(tmp_path: Path, monkeypatch):
+    api = types.ModuleType("TTS.api")
+    api.TTS = _FakeTTS
+    monkeypatch.setitem(sys.modules, "TTS", types.ModuleType("TTS"))
+    monkeypatch.setitem(sys.modules, "TTS.api", api)
+    _FakeTTS.loads = 0
+
+    engine = XTTSEngine()
+    engine.warmup()
+    for idx in range(3):
+        engine.synthesize("Hello.", tmp_path / f"{idx}.wav")
+    assert _FakeTTS.loads == 1
+    engine.close()
+    assert not engine.loaded
+
+
+class _FakeXtts:
+    computed = 0
+    device = "cpu"
+    config = types.SimpleNamespace()
+
+    def get_conditioning_latents(self, audio_path, **kwargs):
+        type(self).computed += 1
+        import torch
+
+        return torch.zeros(1, 4), torch.ones(1, 2)
+
+    def inference(self, text, language, gpt_cond_latent, speaker_embedding, **kwargs):
+        return {"wav": [0.0]}
+
+
+def test_xtts_speaker_latents_cached_on_disk(tmp_path: Path, monkeypatch):
+    pytest.importorskip("torch")
+
+    class _FakeTTSWithModel(_FakeTTS):
+        def __init__(self, model_name: str):
+            super().__init__(model_name)
+            self.synthesizer = types.SimpleNamespace(
+                tts_model=_FakeXtts(),
+                save_wav=lambda wav, path: Path(path).write_bytes(b"RIFF"),
+            )
+
+    api = types.ModuleType("TTS.api")
+    api.TTS = _FakeTTSWithModel
+    monkeypatch.setitem(sys.modules, "TTS", types.ModuleType("TTS"))
+    monkeypatch.setitem(sys.modules, "TTS.api", api)
+    _FakeXtts.computed = 0
+    speaker = tmp_path / "voice.wav"
+    speaker.write_bytes(b"voice")
+
+    for _ in range(2):
+        engine = XTTSEngine()
+        for idx in range(2):
+            engine.synthesize(
+                "Hello.", tmp_path / f"{idx}.wav", speaker_wav=str(speaker), cache_dir=tmp_path
+            )
+        engine.close()
+    assert _FakeXtts.computed == 1
+    assert list((tmp_path / "xtts_latents").glob("*.pt"))